@@ -0,0 +1,16 @@
+"""
+Warmup inputs for AI engines - run once so the first real document hits warm models
+"""
+
+import io
+from functools import lru_cache
+
+from PIL import Image
+
+
+@lru_cache(maxsize=1)
+def _make_dummy_png() -> bytes:
+    """32x32 white PNG used as a throwaway warmup input"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), 'white').save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -0,0 +1,102 @@
+"""
+Async micro-batching queue for remote AI calls (IBM Granite / AWS Bedrock)
+Coalesces concurrent requests into one batched call to save per-request round-trips
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List
+
+
+class _PendingBatch:
+    """Requests collected on one event loop, waiting to be flushed"""
+
+    __slots__ = ('items', 'futures', 'timer')
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.timer = None
+
+
+class AsyncBatchQueue:
+    """Collect requests for up to max_wait_time (or max_batch_size items) and process them together"""
+
+    def __init__(self, process_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 8,
+                 max_wait_time: float = 0.1):
+        """
+        Args:
+            process_fn: Blocking batch function - takes a list of items and returns
+                        a list of results in the same order
+            max_batch_size: Flush as soon as this many requests are waiting
+            max_wait_time: Seconds to wait for more requests before flushing
+        """
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        # One pending batch per event loop - sync callers each run their own loop
+        self._pending: Dict[asyncio.AbstractEventLoop, _PendingBatch] = {}
+        self._tasks = set()  # Strong refs so in-flight batch tasks are not garbage collected
+
+    async def add_request(self, item: Any) -> Any:
+        """Queue a request and wait for its result from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._drop_closed_loops()
+
+        batch = self._pending.get(loop)
+        if batch is None:
+            batch = self._pending[loop] = _PendingBatch()
+            batch.timer = loop.call_later(self.max_wait_time, self._flush, loop, batch)
+        batch.items.append(item)
+        batch.futures.append(future)
+
+        if len(batch.items) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._flush(loop, batch)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._withdraw(loop, batch, future)
+            raise
+
+    def _withdraw(self, loop: asyncio.AbstractEventLoop, batch: _PendingBatch, future: asyncio.Future):
+        """Take a cancelled request out of a batch that has not been flushed yet"""
+        if self._pending.get(loop) is not batch:
+            return  # Already being processed - its result is simply discarded
+        for index, pending in enumerate(batch.futures):
+            if pending is future:
+                del batch.futures[index], batch.items[index]
+                break
+        if not batch.futures:
+            batch.timer.cancel()
+            del self._pending[loop]
+
+    def _drop_closed_loops(self):
+        """Forget batches left behind on event loops that have since been closed"""
+        for loop in [loop for loop in self._pending if loop.is_closed()]:
+            del self._pending[loop]
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, batch: _PendingBatch):
+        """Detach the pending batch from its loop and start processing it"""
+        if self._pending.get(loop) is batch:
+            del self._pending[loop]
+        task = loop.create_task(self.process_loop(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def process_loop(self, batch: _PendingBatch):
+        """Run one batch through process_fn and fan the results back out to each caller"""
+        try:
+            results = await asyncio.to_thread(self.process_fn, batch.items)
+            if len(results) != len(batch.items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch.items)} requests")
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -3,13 +3,23 @@ AI Engine Configuration for IntelliKYC (Updated for Nova Models + OCR Engines)
 """
 
 import os
+from types import MappingProxyType
 from typing import Dict, List
 
+# Region prefix -> geography prefix of Bedrock cross-region inference profiles
+_INFERENCE_PROFILE_GEOS = {'us': 'us', 'eu': 'eu', 'ap': 'apac'}
+
+
+def _inference_profile(region: str, model_id: str) -> str:
+    """Cross-region inference profile ID for a model, or '' where Bedrock offers none"""
+    geo = _INFERENCE_PROFILE_GEOS.get(region.split('-')[0])
+    return f"{geo}.{model_id}" if geo else ''
+
 class AIConfig:
     """Configuration for AI services"""
 
     # IBM Watson Configuration (Keep existing)
-    IBM_WATSON_API_KEY = os.getenv('IBM_WATSON_API_KEY', 'your_ibm_watson_api_key')
+    IBM_WATSON_API_KEY = os.getenv('IBM_WATSON_API_KEY')
     IBM_WATSON_URL = os.getenv('IBM_WATSON_URL', 'https://api.us-south.watson.cloud.ibm.com')
     IBM_WATSON_VERSION = '2021-05-13'
     
@@ -18,7 +28,7 @@ class AIConfig:
     IBM_NLU_URL = 'https://api.us-south.natural-language-understanding.watson.cloud.ibm.com'
 
     # IBM Granite Configuration (Keep existing)
-    IBM_GRANITE_API_KEY = os.getenv('IBM_GRANITE_API_KEY', 'your_ibm_granite_api_key')
+    IBM_GRANITE_API_KEY = os.getenv('IBM_GRANITE_API_KEY')
     IBM_PROJECT_ID = os.getenv('IBM_PROJECT_ID', 'your_ibm_project_id')
     IBM_GRANITE_13B_MODEL = 'ibm/granite-13b-instruct-v2'
     IBM_GRANITE_20B_MODEL = 'ibm/granite-20b-multilingual'
@@ -26,9 +36,14 @@ class AIConfig:
 
     # AWS Bedrock Configuration (UPDATED FOR NOVA MODELS)
     AWS_BEDROCK_REGION = os.getenv('AWS_BEDROCK_REGION', 'us-east-1')
-    AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY_ID','nsert_key') # Required - remove default
-    AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY','insert_key') # Required - remove default
+    # Secrets have no defaults - when unset, boto3's default credential chain (shared config, SSO, IAM role) is used
+    AWS_ACCESS_KEY = os.getenv('AWS_ACCESS_KEY_ID')
+    AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
     AWS_SESSION_TOKEN = os.getenv('AWS_SESSION_TOKEN') # Optional for temporary credentials
+    BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '64'))  # Shared keep-alive pool
+    BEDROCK_CONNECT_TIMEOUT = float(os.getenv('BEDROCK_CONNECT_TIMEOUT', '3'))
+    BEDROCK_READ_TIMEOUT = float(os.getenv('BEDROCK_READ_TIMEOUT', '60'))  # Long Nova generations need headroom
+    BEDROCK_SDK_MAX_ATTEMPTS = int(os.getenv('BEDROCK_SDK_MAX_ATTEMPTS', '1'))  # botocore attempts per call - >1 multiplies with REMOTE_RETRY_MAX_TRIES
 
     # 🆕 Available Nova Models (Your Available Models)
     AWS_BEDROCK_NOVA_MODELS = {
@@ -42,6 +57,10 @@ class AIConfig:
 
     # PRIMARY MODEL FOR DOCUMENT ANALYSIS - Nova Pro (Multimodal!)
     AWS_BEDROCK_NOVA_MODEL = AWS_BEDROCK_NOVA_MODELS['nova_pro']
+    # Nova Pro is called through a cross-region inference profile, so throttled regions are
+    # routed around instead of failing over to Lite (set to '' to call the in-region model)
+    AWS_BEDROCK_NOVA_PRO_PROFILE = os.getenv('AWS_BEDROCK_NOVA_PRO_PROFILE',
+                                             _inference_profile(AWS_BEDROCK_REGION, AWS_BEDROCK_NOVA_MODEL))
     # FALLBACK MODEL FOR SIMPLE TASKS - Nova Lite
     AWS_BEDROCK_NOVA_LITE_MODEL = AWS_BEDROCK_NOVA_MODELS['nova_lite']
     # EMBEDDINGS MODEL - Titan V2
@@ -52,54 +71,83 @@ class AIConfig:
 
     # 🎛️ Nova Model Parameters (Optimized for document analysis)
     NOVA_MAX_TOKENS = 8192 # Nova Pro supports long context
+    NOVA_RISK_MAX_TOKENS = int(os.getenv('NOVA_RISK_MAX_TOKENS', '600'))  # Risk JSON is well under this (per document)
+    NOVA_AUTHENTICITY_MAX_TOKENS = int(os.getenv('NOVA_AUTHENTICITY_MAX_TOKENS', '800'))
     NOVA_TEMPERATURE = 0.1 # Low for consistent analysis
     NOVA_TOP_P = 0.9
+    NOVA_LATENCY_OPTIMIZED = os.getenv('NOVA_LATENCY_OPTIMIZED', 'true').lower() == 'true'  # Converse performanceConfig
+    NOVA_STREAM_JSON_RESPONSES = os.getenv('NOVA_STREAM_JSON_RESPONSES', 'true').lower() == 'true'  # ConverseStream, stop at end of JSON
 
     # 🖼️ Nova Pro supports both text and images!
     NOVA_MULTIMODAL = True # Enable image + text processing
     NOVA_MAX_IMAGE_SIZE = 25 # MB - for document images
 
     # 📊 Embeddings V2 Parameters
-    TITAN_EMBEDDINGS_DIMENSIONS = 512 # Good balance: accuracy vs cost
+    TITAN_EMBEDDINGS_DIMENSIONS = 256 # Titan V2 native size - ample for near-duplicate lookups
     TITAN_NORMALIZE_EMBEDDINGS = True
+    BEDROCK_CACHE_SIZE = int(os.getenv('BEDROCK_CACHE_SIZE', '4096'))  # Cached risk analyses / embeddings
+    BEDROCK_CACHE_TTL_SECONDS = int(os.getenv('BEDROCK_CACHE_TTL_SECONDS', '3600'))
+    RISK_SEMANTIC_CACHE = os.getenv('RISK_SEMANTIC_CACHE', 'false').lower() == 'true'  # Reuse near-duplicate analyses
+    RISK_SEMANTIC_CACHE_SIZE = int(os.getenv('RISK_SEMANTIC_CACHE_SIZE', '10000'))
+    RISK_SEMANTIC_CACHE_THRESHOLD = float(os.getenv('RISK_SEMANTIC_CACHE_THRESHOLD', '0.97'))  # Cosine similarity
+    EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '16'))  # Concurrent Titan calls per embeddings batch
+    EMBED_BATCH_MAX_WAIT_SECONDS = float(os.getenv('EMBED_BATCH_MAX_WAIT_SECONDS', '0.01'))
 
     # 🆕 OCR ENGINE CONFIGURATION (MISSING - ADD THIS)
     # OCR Engines in order of preference
     OCR_ENGINES = ['easyocr', 'ocr_space', 'mock']
+    EASYOCR_GPU = os.getenv('EASYOCR_GPU', 'auto').lower()  # 'auto' = use CUDA when torch finds a GPU
+    EASYOCR_FP16 = os.getenv('EASYOCR_FP16', 'true').lower() == 'true'  # fp16 autocast on GPU
     
     # OCR.space API Configuration
-    OCR_SPACE_API_KEY = os.getenv('OCR_SPACE_API_KEY', 'insert_key')  # Get free key at https://ocr.space/ocrapi
+    OCR_SPACE_API_KEY = os.getenv('OCR_SPACE_API_KEY')  # Get free key at https://ocr.space/ocrapi
     OCR_SPACE_URL = 'https://api.ocr.space/parse/image'
     
     # OCR Processing Parameters
     OCR_MAX_IMAGE_SIZE_MB = 5  # Maximum image size for OCR processing
-    OCR_SUPPORTED_FORMATS = ['jpg', 'jpeg', 'png', 'pdf', 'bmp', 'gif']
+    OCR_SUPPORTED_FORMATS = frozenset({'jpg', 'jpeg', 'png', 'pdf', 'bmp', 'gif'})  # Membership checks only
     OCR_DEFAULT_LANGUAGE = 'eng'  # English language code
+    OCR_BATCH_WORKERS = int(os.getenv('OCR_BATCH_WORKERS', '8'))  # Concurrent OCR.space requests per batch
     OCR_CONFIDENCE_THRESHOLD = 0.7  # Minimum confidence for accepting OCR results
 
     # Document Processing Settings (Keep existing)
-    SUPPORTED_FORMATS = ['jpg', 'jpeg', 'png', 'pdf']
+    SUPPORTED_FORMATS = frozenset({'jpg', 'jpeg', 'png', 'pdf'})
     MAX_FILE_SIZE_MB = 10
     FRAUD_DETECTION_THRESHOLD = 0.6
+    DOCUMENT_CONCURRENCY = int(os.getenv('IKYC_CONCURRENCY', str(os.cpu_count() or 4)))  # Documents processed in parallel
+    CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', str(os.cpu_count() or 4)))  # OpenCV preprocessing/tampering
+    PIPELINE_CONCURRENCY = int(os.getenv('PIPELINE_CONCURRENCY', '5'))  # Max AI stages in flight per document
+    AI_BATCH_MAX_SIZE = int(os.getenv('AI_BATCH_MAX_SIZE', '8'))  # Documents per batched Granite/Bedrock call
+    AI_BATCH_MAX_WAIT_SECONDS = float(os.getenv('AI_BATCH_MAX_WAIT_SECONDS', '0.1'))  # Wait to fill a batch
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '10000'))  # Cached pipeline results (by image hash)
+    RESULT_CACHE_TTL_SECONDS = int(os.getenv('RESULT_CACHE_TTL_SECONDS', '3600'))
+    OCR_CACHE_SIZE = int(os.getenv('OCR_CACHE_SIZE', '4096'))  # Cached OCR results (by processed image hash)
+    NLU_CACHE_SIZE = int(os.getenv('NLU_CACHE_SIZE', '4096'))  # Cached NLU analyses (by text hash + document type)
+    GRANITE_RATE_LIMIT_RPS = float(os.getenv('GRANITE_RATE_LIMIT_RPS', '10'))  # Shared across all threads
+    BEDROCK_RATE_LIMIT_RPS = float(os.getenv('BEDROCK_RATE_LIMIT_RPS', '5'))
+    NLU_RATE_LIMIT_RPS = float(os.getenv('NLU_RATE_LIMIT_RPS', '10'))
+    NLU_BATCH_WORKERS = int(os.getenv('NLU_BATCH_WORKERS', '8'))  # Concurrent NLU calls per document batch
+    REMOTE_RETRY_MAX_TRIES = int(os.getenv('REMOTE_RETRY_MAX_TRIES', '6'))  # Attempts per throttled AI call
+    REMOTE_RETRY_MAX_DELAY_SECONDS = float(os.getenv('REMOTE_RETRY_MAX_DELAY_SECONDS', '30'))
 
     # Fraud Detection Parameters (Keep existing)
-    FRAUD_INDICATORS = {
+    FRAUD_INDICATORS = MappingProxyType({  # Read-only - shared by every processor
         'low_ocr_confidence': 0.5,
         'inconsistent_fonts': 0.7,
         'image_quality_issues': 0.6,
         'suspicious_patterns': 0.8
-    }
+    })
 
     # Document Field Mappings (Keep existing)
-    AADHAAR_FIELDS = [
+    AADHAAR_FIELDS = (
         'aadhaar_number', 'name', 'date_of_birth', 'gender',
         'address', 'father_name', 'issue_date'
-    ]
+    )
 
-    PAN_FIELDS = [
+    PAN_FIELDS = (
         'pan_number', 'name', 'father_name', 'date_of_birth',
         'signature', 'issue_date'
-    ]
+    )
 
     # 🆕 Enhanced Prompts for Nova Models
     NOVA_FRAUD_DETECTION_PROMPT = """
@@ -129,6 +177,58 @@ RESPONSE FORMAT: Return ONLY valid JSON with this structure:
     "confidence_level": "HIGH|MEDIUM|LOW",
     "analysis_reasoning": "Brief explanation of the assessment"
 }}
+"""
+
+    # Batched variant - several documents scored in one Nova call
+    NOVA_BATCH_FRAUD_DETECTION_PROMPT = """
+You are an expert document fraud detection AI. Analyze EACH of the following {document_count} documents independently for potential fraud indicators.
+
+{documents}
+
+ANALYSIS REQUIREMENTS (per document):
+1. Document authenticity assessment (0-1 score)
+2. Information consistency check (0-1 score)
+3. Fraud probability calculation (0-1 score)
+4. Overall risk score (0-1 score)
+5. Specific risk factors identified
+6. Actionable recommendations
+
+RESPONSE FORMAT: Return ONLY a valid JSON array with exactly {document_count} objects, in the same order as the documents, each with this structure:
+{{
+    "document_authenticity_risk": <float>,
+    "information_consistency_risk": <float>,
+    "fraud_probability": <float>,
+    "overall_risk_score": <float>,
+    "risk_factors": ["list", "of", "specific", "risks"],
+    "recommendations": ["list", "of", "recommendations"],
+    "confidence_level": "HIGH|MEDIUM|LOW",
+    "analysis_reasoning": "Brief explanation of the assessment"
+}}
+"""
+
+    NOVA_BATCH_DOCUMENT_TEMPLATE = """DOCUMENT {index}:
+- Document Text: {document_text}
+- OCR Confidence: {ocr_confidence}
+- Document Type: {document_type}
+"""
+
+    NOVA_AUTHENTICITY_PROMPT = """
+Validate the authenticity of this financial identity document using advanced analysis:
+
+DOCUMENT DETAILS:
+- Extracted Text: {extracted_text}
+- OCR Confidence: {ocr_confidence}
+- Image Quality Metrics: {image_quality}
+- Extracted Fields: {field_extractions}
+
+VALIDATION REQUIREMENTS:
+1. Document format compliance check
+2. Cross-field data consistency analysis
+3. Expected vs actual information pattern matching
+4. Digital/physical tampering indicators
+5. Authenticity confidence scoring
+
+Return JSON with authenticity assessment.
 """
 
     # 🔄 Legacy prompts (for backwards compatibility)
@@ -2,14 +2,12 @@
 IBM Granite AI Integration for semantic analysis and fraud detection
 """
 
+import asyncio
 import json
-import sys
-import os
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.ai_config import AIConfig
+from ..config.ai_config import AIConfig
+from ..limits import granite_limiter, retry_on_throttle
 
 class GraniteAIProcessor:
     """IBM Granite AI for semantic analysis and fraud detection"""
@@ -30,17 +28,7 @@ class GraniteAIProcessor:
             return self._mock_semantic_analysis(document_text, document_type)
         
         try:
-            # Your IBM Granite semantic analysis logic here
-            return {
-                'success': True,
-                'semantic_analysis': {
-                    'document_type_confidence': 0.92,
-                    'language_detected': 'english',
-                    'content_validity': 0.88,
-                    'structure_compliance': True
-                },
-                'ai_model': 'IBM_Granite'
-            }
+            return self._call_granite(self._request_semantic_analysis, document_text, document_type)
         except Exception as e:
             return {
                 'success': False,
@@ -53,26 +41,95 @@ class GraniteAIProcessor:
             return self._mock_fraud_detection(document_text, field_extractions)
         
         try:
-            # Your fraud detection logic here
-            fraud_score = 0.15  # Mock score
-            
-            return {
-                'success': True,
-                'fraud_score': fraud_score,
-                'ai_analysis': {
-                    'confidence': 0.89,
-                    'patterns_detected': ['none'],
-                    'anomaly_score': 0.12
-                },
-                'overall_risk': 'LOW',
-                'ai_model': 'IBM_Granite'
-            }
+            return self._call_granite(self._request_fraud_detection, document_text, field_extractions)
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Granite fraud detection failed: {str(e)}"
             }
     
+    def analyze_documents_semantics_batch(self, documents: List[Tuple[str, str]]) -> List[Dict]:
+        """Analyze several (document_text, document_type) pairs in one Granite request"""
+        if len(documents) == 1 or not self.is_available:
+            return [self.analyze_document_semantics(text, doc_type) for text, doc_type in documents]
+        
+        try:
+            return self._call_granite(self._request_semantic_analysis_batch, documents)
+        except Exception as e:
+            return [
+                {
+                    'success': False,
+                    'error': f"Granite batch semantic analysis failed: {str(e)}"
+                }
+                for _ in documents
+            ]
+
+    async def analyze_document_semantics_async(self, document_text: str, document_type: str) -> Dict:
+        """Async variant of analyze_document_semantics (runs the blocking call in a worker thread)"""
+        return await asyncio.to_thread(self.analyze_document_semantics, document_text, document_type)
+
+    async def detect_fraud_patterns_async(self, document_text: str, field_extractions: Dict) -> Dict:
+        """Async variant of detect_fraud_patterns (runs the blocking call in a worker thread)"""
+        return await asyncio.to_thread(self.detect_fraud_patterns, document_text, field_extractions)
+
+    @retry_on_throttle()
+    def _call_granite(self, request: Callable, *args):
+        """
+        Granite request behind the shared Granite rate limiter, retried with backoff when throttled -
+        inside the public methods' error handling, so throttling is retried before it becomes a failure dict
+        """
+        granite_limiter.acquire()
+        return request(*args)
+
+    def _request_semantic_analysis(self, document_text: str, document_type: str) -> Dict:
+        """One Granite semantic analysis request"""
+        # Your IBM Granite semantic analysis logic here
+        return {
+            'success': True,
+            'semantic_analysis': {
+                'document_type_confidence': 0.92,
+                'language_detected': 'english',
+                'content_validity': 0.88,
+                'structure_compliance': True
+            },
+            'ai_model': 'IBM_Granite'
+        }
+
+    def _request_semantic_analysis_batch(self, documents: List[Tuple[str, str]]) -> List[Dict]:
+        """One Granite request covering every document"""
+        # Your IBM Granite batched semantic analysis logic here (one request for all documents)
+        return [
+            {
+                'success': True,
+                'semantic_analysis': {
+                    'document_type_confidence': 0.92,
+                    'language_detected': 'english',
+                    'content_validity': 0.88,
+                    'structure_compliance': True
+                },
+                'ai_model': 'IBM_Granite',
+                'batch_size': len(documents)
+            }
+            for _ in documents
+        ]
+
+    def _request_fraud_detection(self, document_text: str, field_extractions: Dict) -> Dict:
+        """One Granite fraud detection request"""
+        # Your fraud detection logic here
+        fraud_score = 0.15  # Mock score
+        
+        return {
+            'success': True,
+            'fraud_score': fraud_score,
+            'ai_analysis': {
+                'confidence': 0.89,
+                'patterns_detected': ['none'],
+                'anomaly_score': 0.12
+            },
+            'overall_risk': 'LOW',
+            'ai_model': 'IBM_Granite'
+        }
+    
     def _mock_semantic_analysis(self, document_text: str, document_type: str) -> Dict:
         """Mock semantic analysis for testing"""
         return {
@@ -2,22 +2,65 @@
 IBM NLU Integration for Enhanced Document Analysis
 """
 
+import asyncio
+import copy
+import hashlib
 import json
-from typing import Dict, List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 from ibm_watson import NaturalLanguageUnderstandingV1
-from ibm_watson.natural_language_understanding_v1 import Features, SentimentOptions, EntitiesOptions, KeywordsOptions, ConceptsOptions, CategoriesOptions, EmotionOptions
+from ibm_watson.natural_language_understanding_v1 import Features, SentimentOptions, EntitiesOptions, KeywordsOptions, EmotionOptions
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
-import sys
-import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.ai_config import AIConfig
+try:
+    import ahocorasick  # Optional: pyahocorasick automaton for the suspicious-term scan
+except ImportError:
+    ahocorasick = None
+
+from ..config.ai_config import AIConfig
+from ..limits import nlu_limiter, retry_on_throttle
+from ..result_types import EntityConsistency, NLUAnalysis, SentimentAnalysis
+from ..utils.cache import TTLCache
+
+_SUSPICIOUS_WORDS = (
+    'fake', 'forged', 'duplicate', 'copy', 'scan', 'photocopy',
+    'temporary', 'expired', 'invalid', 'cancelled'
+)
+# ID cards: short, factual OCR text - sentiment and emotion carry no signal there
+_ID_CARD_TYPES = frozenset({'aadhaar', 'pan'})
+
+# Substring match of any suspicious term in one C-level scan
+_SUSPICIOUS_TERMS = re.compile('|'.join(map(re.escape, _SUSPICIOUS_WORDS)))
+
+
+def _build_suspicious_automaton():
+    """Aho-Corasick automaton over the suspicious terms, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for term in _SUSPICIOUS_WORDS:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+
+_SUSPICIOUS_AUTOMATON = _build_suspicious_automaton()
+
+
+def _has_suspicious_term(text: str) -> bool:
+    """Whether any suspicious term occurs in text - one automaton pass, or the regex alternation"""
+    if _SUSPICIOUS_AUTOMATON is None:
+        return _SUSPICIOUS_TERMS.search(text) is not None
+    return next(_SUSPICIOUS_AUTOMATON.iter(text), None) is not None
 
 class IBMNLUProcessor:
     """IBM NLU for enhanced document understanding and fraud detection"""
 
     def __init__(self):
         """Initialize IBM NLU client"""
+        self._result_cache = TTLCache(maxsize=AIConfig.NLU_CACHE_SIZE, ttl=AIConfig.RESULT_CACHE_TTL_SECONDS)
         try:
             authenticator = IAMAuthenticator(AIConfig.IBM_GRANITE_API_KEY)
             self.nlu = NaturalLanguageUnderstandingV1(
@@ -37,31 +80,26 @@ class IBMNLUProcessor:
         if not self.is_available:
             return self._mock_nlu_analysis(document_text, document_type)
 
-        try:
-            # Configure NLU features for KYC analysis
-            features = Features(
-                sentiment=SentimentOptions(document=True),
-                entities=EntitiesOptions(model='latest', limit=50),
-                keywords=KeywordsOptions(limit=50, sentiment=True),
-                concepts=ConceptsOptions(limit=50),
-                categories=CategoriesOptions(),
-                emotion=EmotionOptions(document=True)
-            )
+        # Same text already analyzed (retry, re-verification, duplicate upload) - skip the paid call
+        cache_key = (hashlib.blake2b(document_text.encode('utf-8'), digest_size=16).hexdigest(), document_type)
+        cached_result = self._result_cache.get(cache_key)
+        if cached_result is not None:
+            return copy.deepcopy(cached_result)
 
-            response = self.nlu.analyze(
-                text=document_text,
-                features=features
-            ).get_result()
+        try:
+            response = self._analyze(document_text, self._features_for(document_type))
 
             # Process and score results
             analysis_results = self._process_nlu_response(response, document_type)
             
-            return {
+            result = {
                 'success': True,
-                'nlu_analysis': analysis_results,
+                'nlu_analysis': analysis_results.to_dict(),
                 'ai_service': 'IBM_NLU',
                 'document_type': document_type
             }
+            self._result_cache.set(cache_key, copy.deepcopy(result))
+            return result
 
         except Exception as e:
             return {
@@ -69,126 +107,149 @@ class IBMNLUProcessor:
                 'error': f"NLU analysis failed: {str(e)}"
             }
 
-    def _process_nlu_response(self, response: Dict, document_type: str) -> Dict:
+    def analyze_documents_batch(self, documents: List[Tuple[str, str]], max_workers: int = None) -> List[Dict]:
+        """
+        Analyze several (document_text, document_type) pairs. NLU takes one text per request,
+        so the calls run concurrently (still within the shared NLU rate limit)
+        """
+        if len(documents) <= 1 or not self.is_available:
+            return [self.analyze_document_content(text, doc_type) for text, doc_type in documents]
+
+        workers = min(len(documents), max_workers or AIConfig.NLU_BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ikyc-nlu') as executor:
+            return list(executor.map(lambda document: self.analyze_document_content(*document), documents))
+
+    async def analyze_document_content_async(self, document_text: str, document_type: str) -> Dict:
+        """Async variant of analyze_document_content (runs the blocking call in a worker thread)"""
+        return await asyncio.to_thread(self.analyze_document_content, document_text, document_type)
+
+    @cached_property
+    def features(self) -> Features:
+        """
+        NLU features for free-form documents - built once and reused for every request.
+        Concepts and categories are not requested: nothing in the analysis reads them.
+        """
+        return Features(
+            sentiment=SentimentOptions(document=True),
+            entities=EntitiesOptions(model='latest', limit=50),
+            keywords=KeywordsOptions(limit=50, sentiment=True),
+            emotion=EmotionOptions(document=True)
+        )
+
+    @cached_property
+    def id_card_features(self) -> Features:
+        """NLU features for ID cards - only the entities and keywords the checks use"""
+        return Features(
+            entities=EntitiesOptions(model='latest', limit=50),
+            keywords=KeywordsOptions(limit=50)
+        )
+
+    def _features_for(self, document_type: str) -> Features:
+        return self.id_card_features if document_type in _ID_CARD_TYPES else self.features
+
+    @retry_on_throttle()
+    def _analyze(self, document_text: str, features: Features) -> Dict:
+        """One NLU analyze request behind the shared rate limiter, retried with backoff when throttled"""
+        nlu_limiter.acquire()
+        return self.nlu.analyze(text=document_text, features=features).get_result()
+
+    def _process_nlu_response(self, response: Dict, document_type: str) -> NLUAnalysis:
         """Process NLU response for KYC-specific insights"""
-        analysis = {
-            'sentiment_analysis': {},
-            'entity_consistency': {},
-            'fraud_indicators': [],
-            'document_quality_score': 0.0,
-            'suspicious_patterns': []
-        }
+        analysis = NLUAnalysis()
 
         # Sentiment Analysis
         if 'sentiment' in response:
             sentiment = response['sentiment']['document']
-            analysis['sentiment_analysis'] = {
-                'label': sentiment['label'],
-                'score': sentiment['score'],
-                'is_suspicious': sentiment['label'] == 'negative' and abs(sentiment['score']) > 0.7
-            }
+            analysis.sentiment_analysis = SentimentAnalysis(
+                label=sentiment['label'],
+                score=sentiment['score'],
+                is_suspicious=sentiment['label'] == 'negative' and abs(sentiment['score']) > 0.7
+            )
             
-            if analysis['sentiment_analysis']['is_suspicious']:
-                analysis['fraud_indicators'].append('suspicious_negative_sentiment')
+            if analysis.sentiment_analysis.is_suspicious:
+                analysis.fraud_indicators.append('suspicious_negative_sentiment')
 
         # Entity Consistency Analysis
         if 'entities' in response:
             entities = response['entities']
-            analysis['entity_consistency'] = self._analyze_entity_consistency(entities, document_type)
+            analysis.entity_consistency = self._analyze_entity_consistency(entities, document_type)
 
         # Keyword Analysis for Fraud Detection
         if 'keywords' in response:
             keywords = response['keywords']
             suspicious_keywords = self._detect_suspicious_keywords(keywords)
             if suspicious_keywords:
-                analysis['suspicious_patterns'].extend(suspicious_keywords)
+                analysis.suspicious_patterns.extend(suspicious_keywords)
 
         # Emotion Analysis (unusual emotional patterns can indicate fraud)
         if 'emotion' in response:
             emotions = response['emotion']['document']['emotion']
             high_emotions = [emotion for emotion, score in emotions.items() if score > 0.7]
             if high_emotions:
-                analysis['fraud_indicators'].append(f'high_emotion_detected_{high_emotions}')
+                analysis.fraud_indicators.append(f'high_emotion_detected_{high_emotions}')
 
         # Calculate overall document quality score
-        analysis['document_quality_score'] = self._calculate_quality_score(analysis)
+        analysis.document_quality_score = self._calculate_quality_score(analysis)
 
         return analysis
 
-    def _analyze_entity_consistency(self, entities: List[Dict], document_type: str) -> Dict:
+    def _analyze_entity_consistency(self, entities: List[Dict], document_type: str) -> EntityConsistency:
         """Analyze entity consistency for fraud detection"""
-        consistency_analysis = {
-            'person_entities': [],
-            'location_entities': [],
-            'organization_entities': [],
-            'inconsistency_score': 0.0,
-            'potential_issues': []
+        consistency_analysis = EntityConsistency()
+        buckets = {
+            'person': consistency_analysis.person_entities,
+            'location': consistency_analysis.location_entities,
+            'organization': consistency_analysis.organization_entities
         }
 
         for entity in entities:
-            entity_type = entity.get('type', '').lower()
-            entity_text = entity.get('text', '')
-            confidence = entity.get('confidence', 0.0)
-
-            if entity_type == 'person':
-                consistency_analysis['person_entities'].append({
-                    'text': entity_text,
-                    'confidence': confidence
-                })
-            elif entity_type == 'location':
-                consistency_analysis['location_entities'].append({
-                    'text': entity_text,
-                    'confidence': confidence
-                })
-            elif entity_type == 'organization':
-                consistency_analysis['organization_entities'].append({
-                    'text': entity_text,
-                    'confidence': confidence
+            bucket = buckets.get(entity.get('type', '').lower())
+            if bucket is not None:
+                bucket.append({
+                    'text': entity.get('text', ''),
+                    'confidence': entity.get('confidence', 0.0)
                 })
 
         # Check for inconsistencies (multiple names, locations, etc.)
-        if len(consistency_analysis['person_entities']) > 2:
-            consistency_analysis['potential_issues'].append('multiple_person_entities')
-            consistency_analysis['inconsistency_score'] += 0.3
+        if len(consistency_analysis.person_entities) > 2:
+            consistency_analysis.potential_issues.append('multiple_person_entities')
+            consistency_analysis.inconsistency_score += 0.3
 
-        if len(consistency_analysis['location_entities']) > 3:
-            consistency_analysis['potential_issues'].append('multiple_location_entities')  
-            consistency_analysis['inconsistency_score'] += 0.2
+        if len(consistency_analysis.location_entities) > 3:
+            consistency_analysis.potential_issues.append('multiple_location_entities')
+            consistency_analysis.inconsistency_score += 0.2
 
         return consistency_analysis
 
     def _detect_suspicious_keywords(self, keywords: List[Dict]) -> List[str]:
         """Detect suspicious keywords that might indicate fraud"""
         suspicious_patterns = []
-        suspicious_terms = [
-            'fake', 'forged', 'duplicate', 'copy', 'scan', 'photocopy',
-            'temporary', 'expired', 'invalid', 'cancelled'
-        ]
 
         for keyword in keywords:
+            if keyword.get('relevance', 0.0) <= 0.5:
+                continue
             keyword_text = keyword.get('text', '').lower()
-            relevance = keyword.get('relevance', 0.0)
-            
-            if any(term in keyword_text for term in suspicious_terms) and relevance > 0.5:
+            if _has_suspicious_term(keyword_text):
                 suspicious_patterns.append(f'suspicious_keyword_{keyword_text}')
 
         return suspicious_patterns
 
-    def _calculate_quality_score(self, analysis: Dict) -> float:
+    def _calculate_quality_score(self, analysis: NLUAnalysis) -> float:
         """Calculate overall document quality score based on NLU analysis"""
         base_score = 1.0
         
         # Deduct for fraud indicators
-        base_score -= len(analysis['fraud_indicators']) * 0.15
+        base_score -= len(analysis.fraud_indicators) * 0.15
         
         # Deduct for suspicious patterns
-        base_score -= len(analysis['suspicious_patterns']) * 0.1
+        base_score -= len(analysis.suspicious_patterns) * 0.1
         
         # Deduct for entity inconsistencies
-        base_score -= analysis['entity_consistency'].get('inconsistency_score', 0.0)
+        if analysis.entity_consistency:
+            base_score -= analysis.entity_consistency.inconsistency_score
         
         # Deduct for negative sentiment
-        if analysis['sentiment_analysis'].get('is_suspicious', False):
+        if analysis.sentiment_analysis and analysis.sentiment_analysis.is_suspicious:
             base_score -= 0.2
 
         return max(0.0, base_score)
@@ -217,6 +278,18 @@ class IBMNLUProcessor:
             'ai_service': 'Mock_IBM_NLU'
         }
 
+    async def analyze_with_granite_async(self, granite_processor, document_text: str, document_type: str,
+                                         field_extractions: Dict) -> Dict:
+        """
+        Run Granite fraud detection and NLU analysis concurrently, then cross-validate them -
+        latency is the slower of the two calls rather than their sum
+        """
+        granite_results, nlu_results = await asyncio.gather(
+            granite_processor.detect_fraud_patterns_async(document_text, field_extractions),
+            self.analyze_document_content_async(document_text, document_type)
+        )
+        return self.cross_validate_with_granite(granite_results, nlu_results)
+
     def cross_validate_with_granite(self, granite_results: Dict, nlu_results: Dict) -> Dict:
         """Cross-validate Granite AI and NLU results"""
         try:
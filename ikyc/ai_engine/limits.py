@@ -0,0 +1,158 @@
+"""
+Rate limiting and retry helpers for remote AI services (IBM Granite, AWS Bedrock)
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from .config.ai_config import AIConfig
+
+logger = logging.getLogger(__name__)
+
+# Error codes AWS/IBM return when a caller is over its request quota
+_THROTTLING_CODES = frozenset({
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'RequestLimitExceeded',
+})
+_THROTTLING_STATUS = frozenset({429, 503})
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe token bucket shared by every thread and event loop in the process.
+    Use `acquire()` from blocking code or `async with limiter:` from coroutines.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        """
+        Args:
+            max_rate: Requests allowed per time_period (also the burst size)
+            time_period: Window length in seconds
+        """
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._rate = max_rate / time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    def acquire(self):
+        """Block the current thread until a request slot is available"""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request slot is available"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+granite_limiter = TokenBucketLimiter(max_rate=AIConfig.GRANITE_RATE_LIMIT_RPS, time_period=1)
+bedrock_limiter = TokenBucketLimiter(max_rate=AIConfig.BEDROCK_RATE_LIMIT_RPS, time_period=1)
+nlu_limiter = TokenBucketLimiter(max_rate=AIConfig.NLU_RATE_LIMIT_RPS, time_period=1)
+
+
+def _error_response(exc: Exception):
+    """Return (status_code, headers, error_code) for botocore/requests style errors"""
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):  # botocore ClientError
+        metadata = response.get('ResponseMetadata', {})
+        return (metadata.get('HTTPStatusCode'), metadata.get('HTTPHeaders', {}),
+                response.get('Error', {}).get('Code'))
+    if response is not None:  # requests.HTTPError
+        return getattr(response, 'status_code', None), getattr(response, 'headers', {}) or {}, None
+    http_response = getattr(exc, 'http_response', None)
+    if http_response is not None:  # ibm_cloud_sdk_core ApiException
+        return getattr(exc, 'code', None), getattr(http_response, 'headers', {}) or {}, None
+    return getattr(exc, 'status_code', None), {}, None
+
+
+def is_throttling_error(exc: Exception) -> bool:
+    """True if the exception means the remote service asked us to slow down"""
+    status, _, code = _error_response(exc)
+    return code in _THROTTLING_CODES or status in _THROTTLING_STATUS
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the server sent one"""
+    _, headers, _ = _error_response(exc)
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None  # HTTP-date form is not used by these services
+
+
+def _backoff_delay(exc: Exception, attempt: int, max_delay: float) -> float:
+    """Server-requested delay, otherwise exponential backoff with full jitter"""
+    retry_after = _retry_after_seconds(exc)
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, 0.5 * 2 ** attempt))
+
+
+def retry_on_throttle(max_tries: int = None, max_delay: float = None) -> Callable:
+    """
+    Retry a sync or async callable while it fails with a throttling error.
+    Any other exception is raised immediately.
+    """
+    max_tries = max_tries or AIConfig.REMOTE_RETRY_MAX_TRIES
+    max_delay = max_delay or AIConfig.REMOTE_RETRY_MAX_DELAY_SECONDS
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_tries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if attempt + 1 >= max_tries or not is_throttling_error(e):
+                            raise
+                        delay = _backoff_delay(e, attempt, max_delay)
+                        logger.warning("%s throttled, retrying in %.2fs (attempt %d/%d)",
+                                       func.__qualname__, delay, attempt + 1, max_tries)
+                        await asyncio.sleep(delay)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt + 1 >= max_tries or not is_throttling_error(e):
+                        raise
+                    delay = _backoff_delay(e, attempt, max_delay)
+                    logger.warning("%s throttled, retrying in %.2fs (attempt %d/%d)",
+                                   func.__qualname__, delay, attempt + 1, max_tries)
+                    time.sleep(delay)
+        return wrapper
+
+    return decorator
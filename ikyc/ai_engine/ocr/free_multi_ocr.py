@@ -3,19 +3,179 @@ Simplified Free Multi-Engine OCR Processor for IntelliKYC
 Uses EasyOCR + OCR.space (both free, no system dependencies!)
 """
 
-import json
-import base64
+import copy
+import hashlib
+import logging
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 import requests
-from typing import Dict, List, Optional
-import sys
-import os
-import io
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    import hyperscan  # Optional: one SIMD pass finds which field patterns can match at all
+except ImportError:
+    hyperscan = None
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR  # Optional: libjpeg-turbo SIMD decode straight into numpy
+    _TURBOJPEG = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # package or libturbojpeg shared library missing
+    _TURBOJPEG = None
+
+from ..config.ai_config import AIConfig
+from ..utils.image_utils import ImageProcessor
+from ..utils.cache import TTLCache
+from ..utils.json_utils import json_loads
+
+logger = logging.getLogger(__name__)
+
+def _decode_image(image_data: bytes):
+    """
+    Image bytes -> 3-channel BGR numpy array, the layout preprocess_document_image hands over
+    (and the one EasyOCR assumes for arrays); JPEGs go through libjpeg-turbo when available
+    """
+    if isinstance(image_data, np.ndarray):
+        return image_data  # Already decoded (preprocess_document_image output, BGR)
+    if _TURBOJPEG is not None and image_data[:2] == b'\xff\xd8':
+        try:
+            return _TURBOJPEG.decode(image_data, pixel_format=TJPF_BGR)
+        except OSError:
+            pass  # Truncated/odd JPEG - let OpenCV/PIL have a go
+    return ImageProcessor.decode_once(image_data)  # Palette/alpha/grey images come out BGR too
+
+
+def _compile_all(*patterns: str) -> Tuple[re.Pattern, ...]:
+    return tuple(re.compile(pattern) for pattern in patterns)
+
+
+def _clean_name(value: str) -> str:
+    return value.strip().title()
+
+
+# Field patterns compiled once at import - within each field the first matching pattern wins.
+# They are searched one by one on purpose: most start with a literal ('name', 'dob', 'father')
+# that re locates with a fast prefix scan and each search stops at its first hit, while one
+# fused alternation has to try every pattern at every position (measured 2.5-4x slower).
+# 12 digits with or without spaces (this also covers a bare \b\d{12}\b). Written as \d(?<=\b\d)
+# rather than \b\d so the pattern starts with a digit class - re then skips ahead to the next
+# digit instead of testing the word boundary at every position of the text
+_AADHAAR_NUMBER_PATTERNS = _compile_all(
+    r'(\d(?<=\b\d)\d{3}\s?\d{4}\s?\d{4})\b',
+)
+_AADHAAR_NAME_PATTERNS = _compile_all(
+    r'name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)',
+    r'name[:\s]+([a-zA-Z\s]+?)$'
+)
+_PAN_NUMBER_PATTERNS = _compile_all(
+    r'\b([A-Z]{5}\d{4}[A-Z])\b'  # 5 letters, 4 digits, 1 letter
+)
+_PAN_NAME_PATTERNS = _compile_all(
+    r'name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|father|dob|date)',
+    r'name[:\s]+([a-zA-Z\s]+?)$'
+)
+_FATHER_NAME_PATTERNS = _compile_all(
+    r'father[\'s]*\s*name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)',
+    r'father[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)'
+)
+_DOB_PATTERNS = _compile_all(
+    r'dob[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
+    r'date\s+of\s+birth[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
+    r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b'
+)
+
+# document_type -> (field, text variant searched, patterns, cleanup)
+_FIELD_PATTERNS = {
+    'aadhaar': (
+        ('aadhaar_number', 'text', _AADHAAR_NUMBER_PATTERNS, lambda value: value.replace(' ', '')),
+        ('name', 'lower', _AADHAAR_NAME_PATTERNS, _clean_name),
+        ('date_of_birth', 'lower', _DOB_PATTERNS, None),
+    ),
+    'pan': (
+        ('pan_number', 'upper', _PAN_NUMBER_PATTERNS, None),
+        ('name', 'lower', _PAN_NAME_PATTERNS, _clean_name),
+        ('father_name', 'lower', _FATHER_NAME_PATTERNS, _clean_name),
+        ('date_of_birth', 'lower', _DOB_PATTERNS, None),
+    ),
+}
+
+
+
+# Hyperscan has no lookbehind - equivalent expressions for the patterns that use one
+_HYPERSCAN_EXPRESSIONS = {
+    _AADHAAR_NUMBER_PATTERNS[0]: r'\b\d{4}\s?\d{4}\s?\d{4}\b',
+}
+
+
+def _build_hyperscan_prefilter():
+    """
+    Hyperscan database of every field pattern, or None without hyperscan. Patterns are
+    matched caselessly on the original text, which for ASCII text finds exactly the
+    patterns that would match their lower/upper-cased variant.
+    """
+    if hyperscan is None:
+        return None, {}
+    pattern_ids = {}
+    for specs in _FIELD_PATTERNS.values():
+        for _, _, patterns, _ in specs:
+            for pattern in patterns:
+                pattern_ids.setdefault(pattern, len(pattern_ids))
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[_HYPERSCAN_EXPRESSIONS.get(pattern, pattern.pattern).encode('ascii') for pattern in pattern_ids],
+        ids=list(pattern_ids.values()),
+        elements=len(pattern_ids),
+        flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+    )
+    return database, pattern_ids
+
+
+_HYPERSCAN_DB, _HYPERSCAN_IDS = _build_hyperscan_prefilter()
+_hyperscan_local = threading.local()  # Scratch space is per thread
+_PREFILTER_MIN_CHARS = 256  # Below this a plain re search is cheaper than the extra scan
+
+
+def _prefilter_patterns(text: str) -> Optional[set]:
+    """Ids of field patterns present in the text, or None when every pattern must be tried"""
+    if _HYPERSCAN_DB is None or len(text) < _PREFILTER_MIN_CHARS or not text.isascii():
+        return None  # re is Unicode-aware, the byte scan is not
+    scratch = getattr(_hyperscan_local, 'scratch', None)
+    if scratch is None:
+        scratch = _hyperscan_local.scratch = hyperscan.Scratch(_HYPERSCAN_DB)
+    present = set()
+    _HYPERSCAN_DB.scan(text.encode('ascii'), match_event_handler=lambda pattern_id, *_: present.add(pattern_id),
+                       scratch=scratch)
+    return present
+
+
+def _easyocr_use_gpu() -> bool:
+    """Whether EasyOCR should run on CUDA (EASYOCR_GPU: true / false / auto)"""
+    if AIConfig.EASYOCR_GPU in ('true', '1'):
+        return True
+    if AIConfig.EASYOCR_GPU != 'auto':
+        return False
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=1)
+def _get_easyocr_reader():
+    """
+    The process-wide EasyOCR reader - the CRAFT + CRNN weights are loaded once, however
+    many processors are created. Calling this before a pre-fork server forks its workers
+    lets them share the loaded weights copy-on-write. Raises ImportError without easyocr.
+    """
+    import easyocr
+    return easyocr.Reader(['en'], gpu=_easyocr_use_gpu(), verbose=False)
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.ai_config import AIConfig
-from utils.image_utils import ImageProcessor
 
 class FreeMultiOCRProcessor:
     """Simplified free multi-engine OCR processor with fallback support"""
@@ -23,6 +183,11 @@ class FreeMultiOCRProcessor:
     def __init__(self):
         """Initialize available free OCR engines"""
         self.engines = {}
+        self._easyocr_gpu = False
+        self._result_cache = TTLCache(maxsize=AIConfig.OCR_CACHE_SIZE, ttl=AIConfig.RESULT_CACHE_TTL_SECONDS)
+        # One keep-alive session so OCR.space requests reuse TCP/TLS connections
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_maxsize=AIConfig.OCR_BATCH_WORKERS))
         self._initialize_engines()
 
     def _initialize_engines(self):
@@ -30,36 +195,50 @@ class FreeMultiOCRProcessor:
         
         # Initialize EasyOCR (Primary - Best accuracy, works offline)
         try:
-            import easyocr
-            self.engines['easyocr'] = easyocr.Reader(['en'], gpu=False, verbose=False)
-            print("✅ EasyOCR initialized successfully")
+            self.engines['easyocr'] = _get_easyocr_reader()
+            use_gpu = self._easyocr_gpu = _easyocr_use_gpu()
+            logger.info("EasyOCR initialized (%s)", 'GPU' if use_gpu else 'CPU')
         except ImportError:
-            print("⚠️ EasyOCR not available - install with: pip install easyocr")
+            logger.warning("EasyOCR not available - install with: pip install easyocr")
         except Exception as e:
-            print(f"⚠️ EasyOCR initialization failed: {e}")
+            logger.warning("EasyOCR initialization failed: %s", e)
 
         # Initialize OCR.space API (Secondary - Free API, 25k/month)
         if AIConfig.OCR_SPACE_API_KEY and AIConfig.OCR_SPACE_API_KEY != 'FREE_API_KEY':
             self.engines['ocr_space'] = True
-            print("✅ OCR.space API initialized successfully")
+            logger.info("OCR.space API initialized")
         else:
-            print("⚠️ OCR.space API key not configured")
-            print("   Get free key at: https://ocr.space/ocrapi")
+            logger.warning("OCR.space API key not configured - get a free key at https://ocr.space/ocrapi")
 
         # Mock engine always available (Fallback - Always works)
         self.engines['mock'] = True
-        print("✅ Mock OCR engine available")
+        logger.debug("Mock OCR engine available")
 
-        print(f"📊 Total OCR engines available: {len(self.engines)}")
+        logger.info("OCR engines available: %s", ', '.join(self.engines))
+
+    def _easyocr_precision(self):
+        """
+        Context for EasyOCR inference: fp16 autocast on GPU (tensor cores), otherwise a no-op.
+        Autocast rather than .half() on the models, because EasyOCR feeds them fp32 tensors.
+        """
+        if not (self._easyocr_gpu and AIConfig.EASYOCR_FP16):
+            return nullcontext()
+        import torch
+        return torch.autocast('cuda', dtype=torch.float16)
 
-    def extract_text_from_document(self, image_data: bytes, document_type: str = 'aadhaar') -> Dict:
+    def extract_text_from_document(self, image_data: bytes = None, document_type: str = 'aadhaar',
+                                   image_array=None, preprocessing_result: Dict = None) -> Dict:
         """
         Extract text using simplified free OCR engines with fallback
+
+        Pass image_array (see ImageProcessor.decode_once) to skip decoding, or the
+        result of ImageProcessor.preprocess_document_image to skip preprocessing too
         """
-        print(f"🔍 Starting simplified multi-engine OCR for {document_type.upper()} document")
+        logger.debug("Starting multi-engine OCR for %s document", document_type)
 
-        # Preprocess image for better OCR
-        preprocessing_result = ImageProcessor.preprocess_document_image(image_data)
+        # Preprocess image for better OCR (unless the caller already did)
+        if preprocessing_result is None:
+            preprocessing_result = ImageProcessor.preprocess_document_image(image_data, image_array)
         if not preprocessing_result['success']:
             return {
                 'success': False,
@@ -68,10 +247,17 @@ class FreeMultiOCRProcessor:
                 'confidence_score': 0.0
             }
 
+        # Same image seen before (retry, re-verification, duplicate upload) - skip the engines
+        cache_key = self._result_cache_key(preprocessing_result['processed_image'], document_type)
+        cached_result = self._result_cache.get(cache_key)
+        if cached_result is not None:
+            logger.debug("Reusing cached %s OCR result", cached_result['ocr_engine'])
+            return copy.deepcopy(cached_result)
+
         # Try engines in order of preference
         for engine_name in AIConfig.OCR_ENGINES:
             if engine_name in self.engines:
-                print(f"📄 Trying {engine_name.upper()} OCR...")
+                logger.debug("Trying %s OCR", engine_name)
                 
                 try:
                     if engine_name == 'easyocr':
@@ -93,13 +279,14 @@ class FreeMultiOCRProcessor:
                     if result['success']:
                         result['image_quality'] = preprocessing_result['quality_metrics']
                         result['ocr_engine'] = engine_name.upper()
-                        print(f"✅ {engine_name.upper()} OCR successful!")
+                        logger.debug("%s OCR successful", engine_name)
+                        self._result_cache.set(cache_key, copy.deepcopy(result))
                         return result
                     else:
-                        print(f"❌ {engine_name.upper()} OCR failed: {result.get('error', 'Unknown error')}")
+                        logger.debug("%s OCR failed: %s", engine_name, result.get('error', 'Unknown error'))
                 
                 except Exception as e:
-                    print(f"❌ {engine_name.upper()} OCR error: {str(e)}")
+                    logger.warning("%s OCR error: %s", engine_name, e)
 
         # All engines failed
         return {
@@ -109,40 +296,113 @@ class FreeMultiOCRProcessor:
             'confidence_score': 0.0
         }
 
-    def _extract_with_easyocr(self, image_data: bytes, document_type: str) -> Dict:
+    def batch_extract(self, images: List[bytes], document_type: str = 'aadhaar') -> List[Dict]:
+        """
+        extract_text_from_document for several images of one document type. Each engine
+        gets every image still without text in one go - EasyOCR as batched inference,
+        OCR.space as concurrent requests - before falling back to the next engine
+        """
+        preprocessed = [ImageProcessor.preprocess_document_image(image_data) for image_data in images]
+        results = [
+            None if preprocessing['success'] else {
+                'success': False,
+                'error': 'Image preprocessing failed',
+                'extracted_text': '',
+                'confidence_score': 0.0
+            }
+            for preprocessing in preprocessed
+        ]
+        cache_keys = [
+            self._result_cache_key(preprocessing['processed_image'], document_type) if preprocessing['success'] else None
+            for preprocessing in preprocessed
+        ]
+        for index, cache_key in enumerate(cache_keys):
+            cached_result = self._result_cache.get(cache_key) if cache_key else None
+            if cached_result is not None:
+                results[index] = copy.deepcopy(cached_result)
+
+        for engine_name in AIConfig.OCR_ENGINES:
+            pending = [index for index, result in enumerate(results) if result is None]
+            if not pending:
+                break
+            if engine_name not in self.engines:
+                continue
+
+            processed_images = [preprocessed[index]['processed_image'] for index in pending]
+            try:
+                if engine_name == 'easyocr':
+                    engine_results = self._extract_with_easyocr_batch(processed_images, document_type)
+                elif engine_name == 'ocr_space':
+                    engine_results = self._extract_with_ocr_space_batch(processed_images, document_type)
+                else:  # mock
+                    engine_results = [self._extract_with_mock(image, document_type) for image in processed_images]
+            except Exception as e:
+                logger.warning("%s batch OCR error: %s", engine_name, e)
+                continue
+
+            extracted = 0
+            for index, result in zip(pending, engine_results):
+                if result['success']:
+                    result['image_quality'] = preprocessed[index]['quality_metrics']
+                    result['ocr_engine'] = engine_name.upper()
+                    results[index] = result
+                    self._result_cache.set(cache_keys[index], copy.deepcopy(result))
+                    extracted += 1
+            logger.debug("%s OCR: text from %d/%d images", engine_name, extracted, len(pending))
+
+        # All engines failed for whatever is left
+        return [
+            result if result is not None else {
+                'success': False,
+                'error': 'All OCR engines failed',
+                'extracted_text': '',
+                'confidence_score': 0.0
+            }
+            for result in results
+        ]
+
+    @staticmethod
+    def _result_cache_key(processed_image: np.ndarray, document_type: str) -> Tuple:
+        """Cache key for an OCR run: hash of the image the engines read + document type"""
+        digest = hashlib.blake2b(np.ascontiguousarray(processed_image), digest_size=16).hexdigest()
+        return digest, processed_image.shape, document_type
+
+    def _extract_with_easyocr_batch(self, images: List[np.ndarray], document_type: str) -> List[Dict]:
+        """EasyOCR batched inference - readtext_batched needs equal sizes, so batch per image shape"""
+        arrays = [_decode_image(image_data) for image_data in images]
+        by_shape = {}
+        for index, array in enumerate(arrays):
+            by_shape.setdefault(array.shape, []).append(index)
+
+        reader = self.engines['easyocr']
+        results = [None] * len(images)
+        for indices in by_shape.values():
+            with self._easyocr_precision():
+                batch = reader.readtext_batched([arrays[index] for index in indices], detail=1)
+            for index, detections in zip(indices, batch):
+                results[index] = self._easyocr_result(detections, document_type)
+        return results
+
+    def _extract_with_ocr_space_batch(self, images: List[np.ndarray], document_type: str) -> List[Dict]:
+        """OCR.space takes one image per request - send them concurrently over the shared session"""
+        if len(images) == 1:
+            return [self._extract_with_ocr_space(images[0], document_type)]
+        with ThreadPoolExecutor(max_workers=min(len(images), AIConfig.OCR_BATCH_WORKERS),
+                                thread_name_prefix='ikyc-ocr') as executor:
+            return list(executor.map(lambda image_data: self._extract_with_ocr_space(image_data, document_type),
+                                     images))
+
+    def _extract_with_easyocr(self, image_data: np.ndarray, document_type: str) -> Dict:
         """Extract text using EasyOCR (Primary engine - works offline)"""
         try:
-            # Convert bytes to PIL Image
-            pil_image = Image.open(io.BytesIO(image_data))
-            
             # EasyOCR expects PIL image or numpy array
-            import numpy as np
-            image_array = np.array(pil_image)
+            image_array = _decode_image(image_data)
             
             # Perform OCR
             reader = self.engines['easyocr']
-            results = reader.readtext(image_array, detail=1)
-            
-            # Process results
-            if not results:
-                return {
-                    'success': False,
-                    'error': 'EasyOCR found no text in image'
-                }
-            
-            extracted_text = ' '.join([result[1] for result in results])
-            confidence_scores = [result[2] for result in results]
-            avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
-            
-            # Extract fields
-            field_extractions = self._extract_document_fields(extracted_text, document_type)
-            
-            return {
-                'success': True,
-                'extracted_text': extracted_text,
-                'confidence_score': avg_confidence,
-                'field_extractions': field_extractions
-            }
+            with self._easyocr_precision():
+                results = reader.readtext(image_array, detail=1)
+            return self._easyocr_result(results, document_type)
             
         except Exception as e:
             return {
@@ -150,16 +410,38 @@ class FreeMultiOCRProcessor:
                 'error': f"EasyOCR failed: {str(e)}"
             }
 
-    def _extract_with_ocr_space(self, image_data: bytes, document_type: str) -> Dict:
+    def _easyocr_result(self, results: List, document_type: str) -> Dict:
+        """Build the OCR result from EasyOCR (bbox, text, confidence) detections"""
+        if not results:
+            return {
+                'success': False,
+                'error': 'EasyOCR found no text in image'
+            }
+
+        extracted_text = ' '.join([result[1] for result in results])
+        # fsum adds the numpy float64 scores in C; np.mean only wins past a few hundred boxes
+        avg_confidence = math.fsum([result[2] for result in results]) / len(results)
+
+        # Extract fields
+        field_extractions = self._extract_document_fields(extracted_text, document_type)
+
+        return {
+            'success': True,
+            'extracted_text': extracted_text,
+            'confidence_score': avg_confidence,
+            'field_extractions': field_extractions
+        }
+
+    def _extract_with_ocr_space(self, image_data: np.ndarray, document_type: str) -> Dict:
         """Extract text using OCR.space free API (Secondary engine)"""
         try:
-            # Encode image as base64
-            encoded_image = base64.b64encode(image_data).decode('utf-8')
+            if isinstance(image_data, np.ndarray):
+                image_data = ImageProcessor.encode_for_transport(image_data, '.jpg')
             
-            # Prepare API request
+            # Prepare API request - the image goes up as a raw multipart file, not base64 form data
             payload = {
                 'apikey': AIConfig.OCR_SPACE_API_KEY,
-                'base64Image': f'data:image/jpeg;base64,{encoded_image}',
+                'filetype': 'JPG',
                 'language': 'eng',
                 'isOverlayRequired': False,
                 'detectOrientation': True,
@@ -168,10 +450,11 @@ class FreeMultiOCRProcessor:
             }
             
             # Make API request with timeout
-            response = requests.post(AIConfig.OCR_SPACE_URL, data=payload, timeout=30)
+            response = self._session.post(AIConfig.OCR_SPACE_URL, data=payload,
+                                          files={'file': ('document.jpg', image_data, 'image/jpeg')}, timeout=30)
             
             if response.status_code == 200:
-                result = response.json()
+                result = json_loads(response.content)
                 
                 if result.get('IsErroredOnProcessing'):
                     return {
@@ -229,7 +512,7 @@ class FreeMultiOCRProcessor:
                 'error': f"OCR.space failed: {str(e)}"
             }
 
-    def _extract_with_mock(self, image_data: bytes, document_type: str) -> Dict:
+    def _extract_with_mock(self, image_data: np.ndarray, document_type: str) -> Dict:
         """Mock OCR extraction (Fallback - always works for testing)"""
         extracted_text = self._get_mock_text(document_type)
         field_extractions = self._extract_document_fields(extracted_text, document_type)
@@ -264,93 +547,49 @@ class FreeMultiOCRProcessor:
 
     def _extract_document_fields(self, text: str, document_type: str) -> Dict:
         """Extract specific fields based on document type"""
-        import re
         fields = {}
         text_lower = text.lower()
+        present = _prefilter_patterns(text) if document_type in _FIELD_PATTERNS else None
 
-        if document_type == 'aadhaar':
-            # Extract Aadhaar number (12 digits with or without spaces)
-            aadhaar_patterns = [
-                r'\b(\d{4}\s?\d{4}\s?\d{4})\b',
-                r'\b(\d{12})\b'
-            ]
-            for pattern in aadhaar_patterns:
-                aadhaar_match = re.search(pattern, text)
-                if aadhaar_match:
-                    fields['aadhaar_number'] = aadhaar_match.group(1).replace(' ', '')
-                    break
-
-            # Extract name (after "name:")
-            name_patterns = [
-                r'name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)',
-                r'name[:\s]+([a-zA-Z\s]+?)$'
-            ]
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text_lower)
-                if name_match:
-                    fields['name'] = name_match.group(1).strip().title()
-                    break
-
-            # Extract DOB patterns
-            dob_patterns = [
-                r'dob[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'date\s+of\s+birth[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b'
-            ]
-            for pattern in dob_patterns:
-                dob_match = re.search(pattern, text_lower)
-                if dob_match:
-                    fields['date_of_birth'] = dob_match.group(1)
+        for field, source, patterns, clean in _FIELD_PATTERNS.get(document_type, ()):
+            haystack = text_lower if source == 'lower' else text.upper() if source == 'upper' else text
+            for pattern in patterns:
+                if present is not None and _HYPERSCAN_IDS[pattern] not in present:
+                    continue  # Known not to match - skip the full-text search
+                match = pattern.search(haystack)
+                if match:
+                    fields[field] = clean(match.group(1)) if clean else match.group(1)
                     break
 
+        if document_type == 'aadhaar':
             # Extract gender
             if 'male' in text_lower and 'female' not in text_lower:
                 fields['gender'] = 'Male'
             elif 'female' in text_lower:
                 fields['gender'] = 'Female'
 
-        elif document_type == 'pan':
-            # Extract PAN number (5 letters, 4 digits, 1 letter)
-            pan_pattern = r'\b([A-Z]{5}\d{4}[A-Z])\b'
-            pan_match = re.search(pan_pattern, text.upper())
-            if pan_match:
-                fields['pan_number'] = pan_match.group(1)
-
-            # Extract name
-            name_patterns = [
-                r'name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|father|dob|date)',
-                r'name[:\s]+([a-zA-Z\s]+?)$'
-            ]
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text_lower)
-                if name_match:
-                    fields['name'] = name_match.group(1).strip().title()
-                    break
-
-            # Extract father's name
-            father_patterns = [
-                r'father[\'s]*\s*name[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)',
-                r'father[:\s]+([a-zA-Z\s]+?)(?:\n|\s{2,}|dob|date)'
-            ]
-            for pattern in father_patterns:
-                father_match = re.search(pattern, text_lower)
-                if father_match:
-                    fields['father_name'] = father_match.group(1).strip().title()
-                    break
+        return fields
 
-            # Extract DOB
-            dob_patterns = [
-                r'dob[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'date\s+of\s+birth[:\s]+(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b'
-            ]
-            for pattern in dob_patterns:
-                dob_match = re.search(pattern, text_lower)
-                if dob_match:
-                    fields['date_of_birth'] = dob_match.group(1)
-                    break
+    def warmup(self, sample_bytes: bytes = None) -> bool:
+        """
+        Run one throwaway inference on the local OCR engine so the first real
+        document does not pay the model warmup cost. Remote engines are skipped.
+        """
+        if 'easyocr' not in self.engines:
+            return False
 
-        return fields
+        try:
+            if sample_bytes is None:
+                from .._warmup import _make_dummy_png
+                sample_bytes = _make_dummy_png()
+            image_array = _decode_image(sample_bytes)
+            with self._easyocr_precision():
+                self.engines['easyocr'].readtext(image_array, detail=1)
+            logger.debug("EasyOCR warmed up")
+            return True
+        except Exception as e:
+            logger.warning("EasyOCR warmup failed: %s", e)
+            return False
 
     def get_available_engines(self) -> List[str]:
         """Get list of available OCR engines"""
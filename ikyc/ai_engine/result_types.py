@@ -0,0 +1,102 @@
+"""
+Structured result records built by the AI orchestrator and processors.
+They convert to plain dicts only when stored in the document result.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class ValidationResult:
+    """Extracted fields compared against customer-provided info"""
+    matched_fields: List[str] = field(default_factory=list)
+    mismatched_fields: List[Dict] = field(default_factory=list)
+    missing_fields: List[str] = field(default_factory=list)
+    validation_score: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'matched_fields': self.matched_fields,
+            'mismatched_fields': self.mismatched_fields,
+            'missing_fields': self.missing_fields,
+            'validation_score': self.validation_score
+        }
+
+
+@dataclass(slots=True)
+class FinalAnalysis:
+    """Final verdict for one processed document"""
+    status: str
+    overall_fraud_score: float
+    overall_confidence: float
+    risk_level: str
+    fraud_indicators: List[str]
+    processing_quality: str
+    recommendation: str
+    summary: str
+
+    def to_dict(self) -> Dict:
+        return {
+            'status': self.status,
+            'overall_fraud_score': self.overall_fraud_score,
+            'overall_confidence': self.overall_confidence,
+            'risk_level': self.risk_level,
+            'fraud_indicators': self.fraud_indicators,
+            'processing_quality': self.processing_quality,
+            'recommendation': self.recommendation,
+            'summary': self.summary
+        }
+
+
+@dataclass(slots=True)
+class SentimentAnalysis:
+    """Document-level NLU sentiment"""
+    label: str
+    score: float
+    is_suspicious: bool
+
+    def to_dict(self) -> Dict:
+        return {
+            'label': self.label,
+            'score': self.score,
+            'is_suspicious': self.is_suspicious
+        }
+
+
+@dataclass(slots=True)
+class EntityConsistency:
+    """NLU entities grouped by type, with the issues they point to"""
+    person_entities: List[Dict] = field(default_factory=list)
+    location_entities: List[Dict] = field(default_factory=list)
+    organization_entities: List[Dict] = field(default_factory=list)
+    inconsistency_score: float = 0.0
+    potential_issues: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            'person_entities': self.person_entities,
+            'location_entities': self.location_entities,
+            'organization_entities': self.organization_entities,
+            'inconsistency_score': self.inconsistency_score,
+            'potential_issues': self.potential_issues
+        }
+
+
+@dataclass(slots=True)
+class NLUAnalysis:
+    """KYC insights from one NLU response; absent features stay None"""
+    sentiment_analysis: Optional[SentimentAnalysis] = None
+    entity_consistency: Optional[EntityConsistency] = None
+    fraud_indicators: List[str] = field(default_factory=list)
+    document_quality_score: float = 0.0
+    suspicious_patterns: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            'sentiment_analysis': self.sentiment_analysis.to_dict() if self.sentiment_analysis else {},
+            'entity_consistency': self.entity_consistency.to_dict() if self.entity_consistency else {},
+            'fraud_indicators': self.fraud_indicators,
+            'document_quality_score': self.document_quality_score,
+            'suspicious_patterns': self.suspicious_patterns
+        }
@@ -0,0 +1,134 @@
+"""
+In-memory caching utilities for AI processing results
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        """
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid after being stored
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value under key, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """
+    Thread-safe nearest-neighbour cache: returns the value stored for the most similar
+    embedding (cosine similarity above threshold) with the same tag, if it has not expired
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600, threshold: float = 0.97):
+        """
+        Args:
+            maxsize: Maximum number of embeddings kept (oldest are overwritten first)
+            ttl: Seconds an entry stays valid after being stored
+            threshold: Minimum cosine similarity that counts as a hit
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._matrix: Optional[np.ndarray] = None  # Unit-length rows, allocated on first set()
+        self._expires = np.zeros(maxsize)
+        self._tags: List[Hashable] = [None] * maxsize
+        self._values: List[Any] = [None] * maxsize
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, embedding, tag: Hashable = None, default: Any = None) -> Any:
+        """Return the value of the closest live entry with this tag, or default"""
+        query = self._normalize(embedding)
+        with self._lock:
+            if query is None or self._matrix is None or query.shape[0] != self._matrix.shape[1]:
+                return default
+            similarities = self._matrix[:self._count] @ query
+            similarities[self._expires[:self._count] < time.monotonic()] = -1.0
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            for slot in candidates[np.argsort(-similarities[candidates])]:
+                if self._tags[slot] == tag:
+                    return self._values[slot]
+            return default
+
+    def set(self, embedding, value: Any, tag: Hashable = None):
+        """Store value for embedding, overwriting the oldest entry when full"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._matrix is None or vector.shape[0] != self._matrix.shape[1]:
+                self._matrix = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+                self._next = self._count = 0
+            slot = self._next
+            self._matrix[slot] = vector
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._tags[slot] = tag
+            self._values[slot] = value
+            self._next = (slot + 1) % self.maxsize
+            self._count = max(self._count, slot + 1)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._matrix = None
+            self._tags = [None] * self.maxsize
+            self._values = [None] * self.maxsize
+            self._next = self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
@@ -2,37 +2,79 @@
 Image processing utilities for document analysis
 """
 
+import asyncio
 import cv2
 import numpy as np
 from PIL import Image
-import base64
 import io
 from typing import Dict, Tuple, Optional
 
+# TRUCO contour tracing (same signature and output as findContours, much faster on fragmented
+# edge maps) when the installed OpenCV build ships it, Suzuki-Abe otherwise
+_find_contours = getattr(cv2, 'findTRUContours', cv2.findContours)
+
 class ImageProcessor:
     """Image processing utilities for document images"""
     
     @staticmethod
-    def preprocess_document_image(image_data: bytes) -> Dict:
+    def decode_once(image_data: bytes) -> np.ndarray:
+        """
+        Decode raw image bytes into a BGR array that every processing step can share
+        
+        Args:
+            image_data: Raw image bytes
+            
+        Returns:
+            np.ndarray: Decoded image in OpenCV (BGR) layout
+        """
+        # One OpenCV call straight to BGR (EXIF orientation ignored, as PIL does)
+        cv_image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if cv_image is not None:
+            return cv_image
+        
+        # Formats OpenCV cannot read (GIF, ...)
+        pil_image = Image.open(io.BytesIO(image_data))
+        
+        # Convert to RGB if needed
+        if pil_image.mode != 'RGB':
+            pil_image = pil_image.convert('RGB')
+        
+        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    
+    @staticmethod
+    def _as_cv_image(image_data: Optional[bytes], image_array: Optional[np.ndarray]) -> np.ndarray:
+        """Use the pre-decoded array when given, otherwise decode the raw bytes"""
+        if image_array is not None:
+            return image_array
+        return ImageProcessor.decode_once(image_data)
+    
+    @staticmethod
+    def _as_gray_image(image_data: Optional[bytes], image_array: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Grayscale view for the analyses that drop colour - decoding raw bytes straight to
+        grayscale lets the JPEG decoder skip the chroma planes entirely
+        """
+        if image_array is None:
+            gray = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION)
+            if gray is not None:
+                return gray
+            image_array = ImageProcessor.decode_once(image_data)  # Formats OpenCV cannot read
+        return cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def preprocess_document_image(image_data: bytes = None, image_array: np.ndarray = None) -> Dict:
         """
         Preprocess document image for better OCR results
         
         Args:
             image_data: Raw image bytes
+            image_array: Already decoded BGR image (see decode_once) - skips decoding
             
         Returns:
-            Dict: Processed image data and quality metrics
+            Dict: Processed image (BGR array, see encode_for_transport for bytes) and quality metrics
         """
         try:
-            # Convert bytes to PIL Image
-            pil_image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if needed
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # Convert to OpenCV format
-            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            cv_image = ImageProcessor._as_cv_image(image_data, image_array)
             
             # Image quality analysis
             quality_metrics = ImageProcessor._analyze_image_quality(cv_image)
@@ -40,14 +82,10 @@ class ImageProcessor:
             # Apply preprocessing based on quality
             processed_image = ImageProcessor._enhance_image(cv_image, quality_metrics)
             
-            # Convert back to bytes
-            _, buffer = cv2.imencode('.jpg', processed_image)
-            processed_bytes = buffer.tobytes()
-            
             return {
                 'success': True,
-                'processed_image': processed_bytes,
-                'original_size': pil_image.size,
+                'processed_image': processed_image,
+                'original_size': (cv_image.shape[1], cv_image.shape[0]),
                 'quality_metrics': quality_metrics,
                 'preprocessing_applied': True
             }
@@ -59,6 +97,17 @@ class ImageProcessor:
                 'preprocessing_applied': False
             }
     
+    @staticmethod
+    def encode_for_transport(image: np.ndarray, fmt: str = '.jpg') -> bytes:
+        """
+        Encode a processed image for sending over the network - only done at that boundary,
+        in-process consumers take the array as is
+        """
+        ok, buffer = cv2.imencode(fmt, image)
+        if not ok:
+            raise ValueError(f"Could not encode image as {fmt}")
+        return buffer.tobytes()
+    
     @staticmethod
     def _analyze_image_quality(image: np.ndarray) -> Dict:
         """Analyze image quality metrics"""
@@ -66,14 +115,15 @@ class ImageProcessor:
         # Convert to grayscale for analysis
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
-        # Calculate blur metric (Laplacian variance)
-        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+        # Brightness (mean) and contrast (std) in one pass
+        mean, std = cv2.meanStdDev(gray)
+        brightness = float(mean[0, 0])
+        contrast = float(std[0, 0])
         
-        # Calculate brightness
-        brightness = np.mean(gray)
-        
-        # Calculate contrast
-        contrast = gray.std()
+        # Calculate blur metric (Laplacian variance) - int16 holds the 3x3 Laplacian of
+        # uint8 exactly and is a quarter of the size of a float64 output
+        _, laplacian_std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+        blur_score = float(laplacian_std[0, 0]) ** 2
         
         # Determine overall quality
         quality_score = 1.0
@@ -104,7 +154,9 @@ class ImageProcessor:
     def _enhance_image(image: np.ndarray, quality_metrics: Dict) -> np.ndarray:
         """Apply image enhancements based on quality analysis"""
         
-        enhanced = image.copy()
+        # Every OpenCV call below returns a new array, so start from the input itself and
+        # only pay for a copy when an enhancement actually applies
+        enhanced = image
         
         # Enhance contrast if needed
         if quality_metrics['contrast'] < 30:
@@ -116,48 +168,57 @@ class ImageProcessor:
         elif quality_metrics['brightness'] > 200:
             enhanced = cv2.convertScaleAbs(enhanced, alpha=1.0, beta=-30)
         
-        # Apply denoising if blurry
+        # Edge-preserving smoothing + unsharp mask if blurry (non-local means denoising cost
+        # seconds per image and targets noise, not blur)
         if quality_metrics['blur_score'] < 100:
-            enhanced = cv2.fastNlMeansDenoisingColored(enhanced)
+            enhanced = cv2.bilateralFilter(enhanced, d=5, sigmaColor=40, sigmaSpace=5)
+            enhanced = cv2.addWeighted(enhanced, 1.5, cv2.GaussianBlur(enhanced, (0, 0), 1.0), -0.5, 0)
         
         return enhanced
     
     @staticmethod
-    def extract_document_regions(image_data: bytes) -> Dict:
-        """Extract key regions from document image"""
+    def edge_map(image_data: bytes = None, image_array: np.ndarray = None) -> np.ndarray:
+        """
+        Canny edge map shared by region extraction and tampering detection - compute it once
+        and pass it as `edges` when running both on the same image
+        """
+        return ImageProcessor._canny(ImageProcessor._as_gray_image(image_data, image_array))
+    
+    @staticmethod
+    def _canny(gray: np.ndarray) -> np.ndarray:
+        """The one set of Canny parameters, so edge maps are interchangeable between analyses"""
+        return cv2.Canny(gray, 50, 150, apertureSize=3, L2gradient=False)
+    
+    @staticmethod
+    def extract_document_regions(image_data: bytes = None, image_array: np.ndarray = None,
+                                 edges: np.ndarray = None) -> Dict:
+        """Extract key regions from document image (pass image_array to skip decoding, edges to skip Canny)"""
         
         try:
-            # Convert to OpenCV format
-            pil_image = Image.open(io.BytesIO(image_data))
-            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
             # Apply edge detection
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+            if edges is None:
+                edges = ImageProcessor.edge_map(image_data, image_array)
             
             # Find contours
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # Extract regions
-            regions = []
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                if w > 50 and h > 20:  # Filter small regions
-                    region = {
-                        'x': x, 'y': y, 'width': w, 'height': h,
-                        'area': w * h
-                    }
-                    regions.append(region)
-            
-            # Sort by area (largest first)
-            regions.sort(key=lambda r: r['area'], reverse=True)
+            contours, _ = _find_contours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            # Bounding boxes of all contours at once, filtered and ranked without per-contour dicts
+            origins, sizes = ImageProcessor._contour_bounding_boxes(contours)
+            keep = (sizes[:, 0] > 50) & (sizes[:, 1] > 20)  # Filter small regions
+            origins, sizes = origins[keep], sizes[keep]
+            areas = sizes[:, 0].astype(np.int64) * sizes[:, 1]
+            
+            # Largest first - stable, so equal areas keep contour order
+            top = np.argsort(-areas, kind='stable')[:10]
+            regions = [
+                {'x': x, 'y': y, 'width': w, 'height': h, 'area': area}
+                for (x, y), (w, h), area in zip(origins[top].tolist(), sizes[top].tolist(), areas[top].tolist())
+            ]
             
             return {
                 'success': True,
-                'regions': regions[:10],  # Top 10 regions
-                'total_regions': len(regions)
+                'regions': regions,  # Top 10 regions
+                'total_regions': len(areas)
             }
             
         except Exception as e:
@@ -167,13 +228,33 @@ class ImageProcessor:
             }
     
     @staticmethod
-    def detect_tampering_signs(image_data: bytes) -> Dict:
-        """Detect potential tampering in document image"""
+    def _contour_bounding_boxes(contours) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        cv2.boundingRect for every contour in a few array operations: per-contour min/max
+        of the concatenated points. Returns (x, y) origins and (width, height) sizes, both (N, 2)
+        """
+        if not contours:
+            return np.empty((0, 2), dtype=np.int32), np.empty((0, 2), dtype=np.int32)
+        points = np.concatenate(contours).reshape(-1, 2)
+        starts = np.zeros(len(contours), dtype=np.intp)
+        np.cumsum(np.fromiter(map(len, contours), dtype=np.intp, count=len(contours))[:-1], out=starts[1:])
+        origins = np.minimum.reduceat(points, starts)
+        return origins, np.maximum.reduceat(points, starts) - origins + 1
+    
+    @staticmethod
+    def detect_tampering_signs(image_data: bytes = None, image_array: np.ndarray = None,
+                               quality_metrics: Dict = None, edges: np.ndarray = None) -> Dict:
+        """
+        Detect potential tampering in document image (pass image_array to skip decoding, the
+        quality_metrics of preprocess_document_image to reuse its grayscale statistics, and
+        the edge_map to skip Canny)
+        """
         
         try:
-            # Convert to OpenCV format
-            pil_image = Image.open(io.BytesIO(image_data))
-            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            # Only grayscale is needed, and not even that when both statistics are supplied
+            gray = None
+            if quality_metrics is None or edges is None:
+                gray = ImageProcessor._as_gray_image(image_data, image_array)
             
             tampering_indicators = {
                 'inconsistent_lighting': False,
@@ -183,14 +264,18 @@ class ImageProcessor:
             }
             
             # Check for inconsistent lighting
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            lighting_variance = np.var(gray)
+            if quality_metrics is not None:
+                lighting_variance = quality_metrics['contrast'] ** 2  # contrast is the std of this gray image
+            else:
+                _, std = cv2.meanStdDev(gray)
+                lighting_variance = float(std[0, 0]) ** 2
             if lighting_variance > 5000:
                 tampering_indicators['inconsistent_lighting'] = True
             
             # Check for irregular edges
-            edges = cv2.Canny(gray, 50, 150)
-            edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
+            if edges is None:
+                edges = ImageProcessor._canny(gray)
+            edge_density = cv2.countNonZero(edges) / edges.size
             if edge_density > 0.15:
                 tampering_indicators['irregular_edges'] = True
             
@@ -209,3 +294,10 @@ class ImageProcessor:
                 'success': False,
                 'error': f"Tampering detection failed: {str(e)}"
             }
+
+    @staticmethod
+    async def detect_tampering_signs_async(image_data: bytes = None, image_array: np.ndarray = None,
+                                           quality_metrics: Dict = None, edges: np.ndarray = None) -> Dict:
+        """Async variant of detect_tampering_signs (OpenCV releases the GIL, so a worker thread is enough)"""
+        return await asyncio.to_thread(ImageProcessor.detect_tampering_signs, image_data, image_array,
+                                       quality_metrics, edges)
@@ -0,0 +1,27 @@
+"""
+JSON (de)serialization for AI service request/response bodies - orjson when installed
+"""
+
+import json
+
+try:
+    import orjson  # C JSON (de)serializer, several times faster than the stdlib on large bodies
+except ImportError:
+    orjson = None
+
+
+def json_loads(data):
+    """Parse a JSON str/bytes body (orjson when installed, stdlib json otherwise)"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def json_dumps(payload) -> bytes:
+    """Serialize a request body to UTF-8 JSON bytes"""
+    return orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode('utf-8')
+
+
+def json_dumps_canonical(payload) -> bytes:
+    """Key-sorted UTF-8 JSON (nested dicts included) - equal payloads give equal bytes, for cache keys"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
@@ -4,8 +4,24 @@ import logging
 from typing import Optional, Dict, Any
 from .config import settings
 
+try:
+    import orjson  # C JSON (de)serializer for the cached payloads
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)  # int keys become strings, as with json
+    return json.dumps(data).encode('utf-8')
+
+
+def _loads(data: bytes) -> Dict[str, Any]:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 class RedisManager:
     def __init__(self):
         try:
@@ -13,8 +29,7 @@ class RedisManager:
                 host=settings.redis_host,
                 port=settings.redis_port,
                 db=settings.redis_db,
-                password=settings.redis_password,
-                decode_responses=True
+                password=settings.redis_password
             )
             self.redis_client.ping()
             logger.info("Connected to Redis successfully")
@@ -24,20 +39,40 @@ class RedisManager:
 
     def set_user_data(self, user_id: str, data: Dict[str, Any], expire_seconds: int = 3600):
         key = f"user:{user_id}"
-        return self.redis_client.setex(key, expire_seconds, json.dumps(data))
+        return self.redis_client.setex(key, expire_seconds, _dumps(data))
 
     def get_user_data(self, user_id: str) -> Optional[Dict[str, Any]]:
         key = f"user:{user_id}"
         data = self.redis_client.get(key)
-        return json.loads(data) if data else None
+        return _loads(data) if data else None
+
+    def set_document_data(self, document_id: str, data: Dict[str, Any], expire_seconds: int = 86400):
+        key = f"document:{document_id}"
+        return self.redis_client.setex(key, expire_seconds, _dumps(data))
+
+    def get_document_data(self, document_id: str) -> Optional[Dict[str, Any]]:
+        key = f"document:{document_id}"
+        data = self.redis_client.get(key)
+        return _loads(data) if data else None
+
+    def set_ocr_result(self, content_hash: str, document_type: str, data: Dict[str, Any],
+                       expire_seconds: int = 86400):
+        """Processing result for a file's content - identical re-uploads skip OCR entirely"""
+        key = f"ocr:{document_type}:{content_hash}"
+        return self.redis_client.setex(key, expire_seconds, _dumps(data))
+
+    def get_ocr_result(self, content_hash: str, document_type: str) -> Optional[Dict[str, Any]]:
+        key = f"ocr:{document_type}:{content_hash}"
+        data = self.redis_client.get(key)
+        return _loads(data) if data else None
 
     def set_session_data(self, session_id: str, data: Dict[str, Any], expire_seconds: int = 1800):
         key = f"session:{session_id}"
-        return self.redis_client.setex(key, expire_seconds, json.dumps(data))
+        return self.redis_client.setex(key, expire_seconds, _dumps(data))
 
     def get_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
         key = f"session:{session_id}"
         data = self.redis_client.get(key)
-        return json.loads(data) if data else None
+        return _loads(data) if data else None
 
 db = RedisManager()
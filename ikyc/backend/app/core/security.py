@@ -1,46 +1,110 @@
+import asyncio
+import base64
 import hashlib
+import hmac
+import json
 import secrets
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
-import jwt
-from passlib.context import CryptContext
+import bcrypt
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+try:
+    import orjson  # C JSON for the token segments
+except ImportError:
+    orjson = None
+
+BCRYPT_MAX_PASSWORD_BYTES = 72  # bcrypt only uses the first 72 bytes (passlib truncated the same way)
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _json_dumps(data: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# Session tokens are always HS256 JWTs, so the header segment is a constant (byte-identical to PyJWT's)
+_JWT_HEADER_SEGMENT = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
 
 class SecurityManager:
-    def __init__(self, secret_key: str = None):
+    def __init__(self, secret_key: str = None, bcrypt_rounds: int = 12):
         self.secret_key = secret_key or secrets.token_urlsafe(32)
         self.algorithm = "HS256"
+        self._signing_key = self.secret_key.encode('utf-8')
+        self.bcrypt_rounds = bcrypt_rounds  # Lower (min 4) only for dev/tests
     
     def hash_password(self, password: str) -> str:
         """Hash a password"""
-        return pwd_context.hash(password)
+        password_bytes = password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES]
+        return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=self.bcrypt_rounds)).decode('ascii')
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password"""
-        return pwd_context.verify(plain_password, hashed_password)
+        password_bytes = plain_password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES]
+        return bcrypt.checkpw(password_bytes, hashed_password.encode('ascii'))
+    
+    async def hash_password_async(self, password: str) -> str:
+        """hash_password in a worker thread - bcrypt releases the GIL, so hashes run in parallel"""
+        return await asyncio.to_thread(self.hash_password, password)
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password in a worker thread - keeps the event loop free during the bcrypt work"""
+        return await asyncio.to_thread(self.verify_password, plain_password, hashed_password)
     
     def generate_session_token(self, user_id: str, expires_delta: timedelta = None) -> str:
         """Generate session token"""
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(hours=24)
+        expires_delta = expires_delta or timedelta(hours=24)
+        expire = int(time.time() + expires_delta.total_seconds())  # NumericDate, whole seconds
         
         to_encode = {"user_id": user_id, "exp": expire}
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        payload_segment = _b64url_encode(_json_dumps(to_encode))
+        signing_input = _JWT_HEADER_SEGMENT + b"." + payload_segment
+        return (signing_input + b"." + _b64url_encode(self._sign(signing_input))).decode('ascii')
     
     def verify_token(self, token: str) -> Optional[str]:
         """Verify and decode token"""
+        if not isinstance(token, str):
+            return None
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            user_id = payload.get("user_id")
-            return user_id
-        except jwt.PyJWTError:
+            signing_input, _, signature = token.encode('ascii').rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+            if not hmac.compare_digest(_b64url_decode(signature), self._sign(signing_input)):
+                return None
+            
+            # Only HS256 is accepted - never trust the token to pick its own algorithm
+            header = _json_loads(_b64url_decode(header_segment))
+            if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+                return None
+            
+            payload = _json_loads(_b64url_decode(payload_segment))
+            if not isinstance(payload, dict):
+                return None
+            if "exp" in payload:
+                expire = payload["exp"]
+                if not isinstance(expire, (int, float)) or isinstance(expire, bool) or expire <= time.time():
+                    return None
+            return payload.get("user_id")
+        except ValueError:  # Malformed base64 / JSON / non-ASCII token
             return None
     
+    def _sign(self, signing_input: bytes) -> bytes:
+        """HS256 signature - one-shot hmac.digest runs entirely inside OpenSSL"""
+        return hmac.digest(self._signing_key, signing_input, "sha256")
+    
     def generate_otp(self, length: int = 6) -> str:
         """Generate OTP"""
-        return ''.join([str(secrets.randbelow(10)) for _ in range(length)])
+        return f"{secrets.randbelow(10 ** length):0{length}d}"  # One uniform draw, zero-padded
 
 security = SecurityManager()
@@ -9,6 +9,8 @@ import cv2
 import mediapipe as mp
 from datetime import datetime
 
+PROBE_MAX_SIDE = 320  # The short-range model runs at 128x128, so probing at this size loses nothing
+
 class LiveFaceValidators:
     """Enhanced validators for live face liveness detection"""
     
@@ -19,6 +21,11 @@ class LiveFaceValidators:
         self.face_detection = self.mp_face_detection.FaceDetection(
             model_selection=0, min_detection_confidence=0.7
         )
+        # Full-range model (faces up to 5 m) - only consulted when the short-range probe misses
+        self.long_range_face_detection = self.mp_face_detection.FaceDetection(
+            model_selection=1, min_detection_confidence=0.7
+        )
+        self._rgb_scratch = {}  # Reused BGR->RGB buffers by shape (MediaPipe copies the input into its own frame)
 
     @staticmethod
     def initiate_live_liveness_check() -> Dict:
@@ -45,9 +52,11 @@ class LiveFaceValidators:
     def detect_face_in_frame(self, frame: np.ndarray) -> Dict:
         """Detect face in video frame"""
         try:
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_detection.process(rgb_frame)
+            # Cheap short-range probe on a downscaled frame first (bbox is relative, so unaffected)
+            results = self.face_detection.process(self._to_rgb(self._probe_frame(frame)))
+            if not results.detections:
+                # Far or turned face - verify with the full-range model at full resolution
+                results = self.long_range_face_detection.process(self._to_rgb(frame))
             
             if not results.detections:
                 return {
@@ -82,6 +91,34 @@ class LiveFaceValidators:
                 "error": f"Face detection failed: {str(e)}"
             }
 
+    def _to_rgb(self, frame: np.ndarray) -> np.ndarray:
+        """Convert BGR to RGB into a scratch buffer instead of a new array per frame"""
+        scratch = self._rgb_scratch.get(frame.shape)
+        if scratch is None:
+            scratch = self._rgb_scratch[frame.shape] = np.empty_like(frame)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=scratch)
+
+    @staticmethod
+    def _probe_frame(frame: np.ndarray) -> np.ndarray:
+        """Frame downscaled (aspect kept) so its longest side is at most PROBE_MAX_SIDE"""
+        height, width = frame.shape[:2]
+        scale = PROBE_MAX_SIDE / max(height, width)
+        if scale >= 1.0:
+            return frame
+        return cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def detect_faces_in_frames(self, video_frames: List[np.ndarray]) -> List[Dict]:
+        """Detect faces across frames, running inference once per distinct frame"""
+        detections = {}  # id(frame) -> result; camera buffers often repeat the same array
+        results = []
+        for frame in video_frames:
+            key = id(frame)
+            if key not in detections:
+                detections[key] = self.detect_face_in_frame(frame)
+            results.append(detections[key])
+        return results
+
     def detect_blink_sequence(self, video_frames: List[np.ndarray]) -> Dict:
         """Detect blinking sequence in video frames"""
         try:
@@ -174,10 +211,8 @@ class LiveFaceValidators:
             }
 
             # Test 1: Continuous face detection
-            face_detection_results = []
-            for frame in video_frames[:10]:  # Check first 10 frames
-                face_result = self.detect_face_in_frame(frame)
-                face_detection_results.append(face_result["face_detected"])
+            face_detections = self.detect_faces_in_frames(video_frames[:10])  # Check first 10 frames
+            face_detection_results = [face["face_detected"] for face in face_detections]
 
             face_consistency = sum(face_detection_results) / len(face_detection_results)
             results["tests_performed"]["face_consistency"] = {
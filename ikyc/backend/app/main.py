@@ -1,12 +1,30 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, status
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import sys
 import os
-import uuid
+import time
 import logging
 from datetime import datetime
 from pathlib import Path
+from secrets import token_hex
+from typing import Tuple
+
+from core.database import db
+from services.document_service import document_processor
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+try:
+    import orjson  # noqa: F401 - ORJSONResponse serializes with it
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
 
 # Configure logging
 logging.basicConfig(
@@ -26,27 +44,87 @@ class MockSettings:
 
 settings = MockSettings()
 
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+ALLOWED_UPLOAD_TYPES = frozenset({"image/jpeg", "image/png", "image/jpg", "application/pdf"})
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_PATH = "/api/v1/documents/upload"
+UPLOAD_ENVELOPE_BYTES = 64 * 1024  # Multipart boundaries and part headers around the file
+
+REDIS_PING_TIMEOUT_SECONDS = 0.5
+REDIS_STATUS_TTL_SECONDS = 1.0  # Health probes within this window reuse the last PING result
+
+def create_redis_client():
+    """Async Redis client over a bounded connection pool - built once and reused by every request"""
+    if aioredis is None:
+        raise ImportError("redis package is not installed")
+    pool = aioredis.ConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        password=settings.redis_password,
+        decode_responses=True,
+        max_connections=32,
+        socket_timeout=1,
+        socket_connect_timeout=1,
+        health_check_interval=30
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+async def close_redis_client(client):
+    if client is not None:
+        await client.connection_pool.disconnect()
+
+async def get_redis_status(app: FastAPI) -> str:
+    """PING the shared client without blocking the event loop, caching the answer briefly"""
+    cached_status, expires_at = getattr(app.state, "redis_status", (None, 0.0))
+    now = time.monotonic()
+    if cached_status is not None and now < expires_at:
+        return cached_status
+    
+    try:
+        # Rebuild the pooled client lazily if a previous probe dropped it
+        if getattr(app.state, "redis", None) is None:
+            app.state.redis = create_redis_client()
+        await asyncio.wait_for(app.state.redis.ping(), timeout=REDIS_PING_TIMEOUT_SECONDS)
+        redis_status = "connected"
+    except Exception:
+        await close_redis_client(getattr(app.state, "redis", None))
+        app.state.redis = None
+        redis_status = "disconnected"
+    
+    app.state.redis_status = (redis_status, now + REDIS_STATUS_TTL_SECONDS)
+    return redis_status
+
+def find_duplicate_routes(app: FastAPI) -> list:
+    """(method, path) pairs registered more than once - FastAPI silently routes to the first"""
+    seen, duplicates = set(), []
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            key = (method, getattr(route, "path", ""))
+            if key in seen:
+                duplicates.append(key)
+            seen.add(key)
+    return duplicates
+
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting IntelliKYC API...")
     
+    for method, path in find_duplicate_routes(app):
+        logger.error(f"❌ Route {method} {path} is registered more than once - only the first handler runs")
+    
     # Create upload directory
     upload_path = Path(settings.upload_dir)
     upload_path.mkdir(parents=True, exist_ok=True)
     logger.info(f"Upload directory: {upload_path}")
     
-    # Test Redis connection
+    # Shared Redis client - test the connection once
+    app.state.redis = None
     try:
-        import redis
-        r = redis.Redis(
-            host=settings.redis_host,
-            port=settings.redis_port,
-            db=settings.redis_db,
-            decode_responses=True
-        )
-        r.ping()
+        app.state.redis = create_redis_client()
+        await app.state.redis.ping()
         logger.info("✅ Redis connection verified")
     except Exception as e:
         logger.warning(f"⚠️ Redis connection failed: {e}")
@@ -57,6 +135,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down IntelliKYC API...")
+    await close_redis_client(app.state.redis)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -65,9 +144,27 @@ app = FastAPI(
     description="AI-Powered KYC Verification System",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=DefaultResponse,  # orjson encoding when installed
     lifespan=lifespan
 )
 
+# Registered before CORS so the 413 still carries the CORS headers
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Turn away uploads whose Content-Length already exceeds the cap - FastAPI parses (and spools)
+    the whole multipart body before upload_document runs, so this is the only point where the
+    body has not been read yet. Chunked requests without a length are caught by _copy_upload
+    """
+    if request.url.path == UPLOAD_PATH:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_ENVELOPE_BYTES:
+            return DefaultResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": "File too large. Max size: 10MB"}
+            )
+    return await call_next(request)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -90,19 +187,7 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     try:
-        redis_status = "not configured"
-        try:
-            import redis
-            r = redis.Redis(
-                host=settings.redis_host,
-                port=settings.redis_port,
-                db=settings.redis_db,
-                decode_responses=True
-            )
-            r.ping()
-            redis_status = "connected"
-        except Exception:
-            redis_status = "disconnected"
+        redis_status = await get_redis_status(app)
         
         return {
             "status": "healthy",
@@ -118,7 +203,38 @@ async def health_check():
             detail=f"Service unhealthy: {str(e)}"
         )
 
-@app.post("/api/v1/documents/upload")
+def _copy_upload(source, file_path: Path) -> Tuple[int, str]:
+    """
+    Copy the spooled upload to disk chunk by chunk, enforcing the 10MB cap as bytes are read
+    and hashing the content on the way through (no second pass over the file)
+    """
+    file_size = 0
+    content_hash = hashlib.blake2b(digest_size=16)
+    try:
+        with open(file_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="File too large. Max size: 10MB"
+                    )
+                content_hash.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        file_path.unlink(missing_ok=True)  # No partial uploads left behind
+        raise
+    return file_size, content_hash.hexdigest()
+
+async def save_upload(file: UploadFile, file_path: Path) -> Tuple[int, str]:
+    """
+    Stream an upload to disk without holding it in memory - the whole copy is one worker-thread
+    job, so the event loop neither waits on the disk nor pays a thread hop per chunk.
+    Returns the file size and content hash
+    """
+    return await asyncio.to_thread(_copy_upload, file.file, file_path)
+
+@app.post(UPLOAD_PATH)
 async def upload_document(
     file: UploadFile = File(...),
     document_type: str = "aadhaar"
@@ -131,26 +247,21 @@ async def upload_document(
                 detail="No file provided"
             )
         
-        content = await file.read()
-        file_size = len(content)
-        
-        # Validate file size (10MB limit)
-        if file_size > 10 * 1024 * 1024:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="File too large. Max size: 10MB"
-            )
-        
-        # Validate file type
-        allowed_types = ["image/jpeg", "image/png", "image/jpg", "application/pdf"]
-        if file.content_type not in allowed_types:
+        # Validate file type and size - the multipart body is already spooled at this point,
+        # only reject_oversized_uploads runs before it is read
+        if file.content_type not in ALLOWED_UPLOAD_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid file type. Allowed: JPEG, PNG, PDF"
             )
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File too large. Max size: 10MB"
+            )
         
         # Save file
-        document_id = str(uuid.uuid4())
+        document_id = token_hex(16)
         file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
         unique_filename = f"{document_id}.{file_extension}"
         
@@ -158,8 +269,23 @@ async def upload_document(
         upload_dir.mkdir(exist_ok=True)
         file_path = upload_dir / unique_filename
         
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        file_size, content_hash = await save_upload(file, file_path)
+        
+        # Metadata for /process - the content hash keys its result cache
+        # (redis-py is blocking, so every db call runs in a worker thread)
+        try:
+            await asyncio.to_thread(db.set_document_data, document_id, {
+                "document_id": document_id,
+                "file_path": str(file_path),
+                "document_type": document_type,
+                "status": "uploaded",
+                "file_size": file_size,
+                "original_filename": file.filename,
+                "content_hash": content_hash
+            })
+        except BaseException:
+            file_path.unlink(missing_ok=True)  # Without its record nothing could ever find the file
+            raise
         
         logger.info(f"📄 Document uploaded: {document_id}")
         
@@ -181,12 +307,57 @@ async def upload_document(
             detail=str(e)
         )
 
+@app.post("/api/v1/documents/{document_id}/process")
+async def process_document(document_id: str):
+    """Process uploaded document with OCR and field extraction"""
+    try:
+        # Get document info from database
+        doc_data = await asyncio.to_thread(db.get_document_data, document_id)
+        if not doc_data:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        document_type = doc_data.get('document_type', 'aadhaar')
+        content_hash = doc_data.get('content_hash')
+        # Earlier runs' results are replaced, but a failed run's error would outlive a successful retry
+        upload_metadata = {key: value for key, value in doc_data.items() if key != 'error'}
+        
+        # Same bytes processed before (re-upload or repeated /process) - skip OCR
+        if content_hash:
+            cached = await asyncio.to_thread(db.get_ocr_result, content_hash, document_type)
+            if cached is not None:
+                result = {**cached, "document_id": document_id}
+                # Record the result against this document too, as a fresh run would
+                await asyncio.to_thread(db.set_document_data, document_id, {**upload_metadata, **result})
+                return result
+        
+        # Process the document (OCR and its db writes block, so off the event loop)
+        result = await asyncio.to_thread(
+            document_processor.process_document,
+            document_id=document_id,
+            file_path=doc_data.get('file_path', ''),
+            document_type=document_type
+        )
+        
+        # Processing overwrote the stored record - keep the upload metadata alongside the result,
+        # failed runs included, so a retry still finds the file
+        await asyncio.to_thread(db.set_document_data, document_id, {**upload_metadata, **result})
+        if content_hash and result.get("status") == "processed":
+            await asyncio.to_thread(db.set_ocr_result, content_hash, document_type, result)
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Document processing failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/v1/verification/start")
 async def start_verification_session(user_id: str = None):
     """Start a new KYC verification session"""
     try:
-        session_id = str(uuid.uuid4())
-        user_id = user_id or str(uuid.uuid4())
+        session_id = token_hex(16)
+        user_id = user_id or token_hex(16)
         
         logger.info(f"🔄 Verification session started: {session_id}")
         
@@ -208,137 +379,14 @@ async def start_verification_session(user_id: str = None):
 # FIXED: Proper uvicorn configuration
 if __name__ == "__main__":
     import uvicorn
+    # Auto-reload (single worker, dev only) when UVICORN_RELOAD=1, otherwise one worker per core
+    reload = os.getenv("UVICORN_RELOAD", "").lower() in ("1", "true", "yes")
     uvicorn.run(
         "main:app",  # ← Import string instead of app object
         host="0.0.0.0",
         port=8000,
-        reload=True
+        loop="auto",  # uvloop when installed (pip install uvloop httptools)
+        http="auto",  # httptools when installed
+        reload=reload,
+        workers=None if reload else max(2, os.cpu_count() or 1)
     )
-# Add these imports to your existing main.py
-from services.document_service import document_processor
-
-# Add this new endpoint after your existing upload endpoint
-@app.post("/api/v1/documents/{document_id}/process")
-async def process_document(document_id: str):
-    """Process uploaded document with OCR and field extraction"""
-    try:
-        # Get document info from database
-        doc_data = db.get_document_data(document_id)
-        if not doc_data:
-            raise HTTPException(status_code=404, detail="Document not found")
-        
-        # Process the document
-        result = document_processor.process_document(
-            document_id=document_id,
-            file_path=doc_data.get('file_path', ''),
-            document_type=doc_data.get('document_type', 'aadhaar')
-        )
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Document processing failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-# Update your upload endpoint to store document metadata
-@app.post("/api/v1/documents/upload")
-async def upload_document(
-    file: UploadFile = File(...),
-    document_type: str = "aadhaar"
-):
-    # ... existing upload code ...
-    
-    # After saving the file, store metadata in database
-    doc_metadata = {
-        "document_id": document_id,
-        "file_path": str(file_path),
-        "document_type": document_type,
-        "status": "uploaded",
-        "file_size": file_size,
-        "original_filename": file.filename
-    }
-    db.set_document_data(document_id, doc_metadata)
-    
-    return {
-        "document_id": document_id,
-        "message": "Document uploaded successfully",
-        "next_step": f"/api/v1/documents/{document_id}/process"
-    }
-
-# Add this import to your existing main.py
-from services.ocr_service_minimal import ocr_service
-from services.document_service import document_processor
-
-# Add this endpoint after your upload endpoint
-@app.post("/api/v1/documents/{document_id}/process")
-async def process_document(document_id: str):
-    """Process uploaded document with OCR and field extraction"""
-    try:
-        # Get document info (you'll need to implement document storage)
-        # For now, reconstruct the file path
-        upload_dir = Path("uploads")
-        
-        # Find the document file
-        document_files = list(upload_dir.glob(f"{document_id}.*"))
-        if not document_files:
-            raise HTTPException(status_code=404, detail="Document not found")
-        
-        file_path = str(document_files[0])
-        
-        # Process with OCR
-        if not ocr_service:
-            raise HTTPException(status_code=500, detail="OCR service not initialized")
-        
-        ocr_result = ocr_service.extract_text(file_path)
-        if not ocr_result:
-            raise HTTPException(status_code=500, detail="OCR processing failed")
-        
-        # Extract fields based on document type (simple extraction)
-        extracted_fields = extract_document_fields(ocr_result['text'], 'aadhaar')
-        
-        return {
-            "document_id": document_id,
-            "status": "processed",
-            "ocr_result": ocr_result,
-            "extracted_fields": extracted_fields
-        }
-        
-    except Exception as e:
-        logger.error(f"Document processing failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-def extract_document_fields(text: str, document_type: str) -> dict:
-    """Simple field extraction logic"""
-    import re
-    fields = {}
-    
-    if document_type == "aadhaar":
-        # Extract Aadhaar number
-        aadhaar_match = re.search(r'\b\d{4}\s*\d{4}\s*\d{4}\b', text)
-        if aadhaar_match:
-            fields['aadhaar_number'] = re.sub(r'\s', '', aadhaar_match.group())
-        
-        # Extract name (look for patterns before DOB or after "Name")
-        name_patterns = [
-            r'Name[:\s]+([A-Za-z\s]+?)(?:\n|DOB|Date)',
-            r'([A-Za-z\s]{10,40})\s*(?:DOB|Date of Birth)'
-        ]
-        for pattern in name_patterns:
-            name_match = re.search(pattern, text, re.IGNORECASE)
-            if name_match:
-                fields['name'] = name_match.group(1).strip()
-                break
-        
-        # Extract DOB
-        dob_patterns = [
-            r'DOB[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{4})',
-            r'Date of Birth[:\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{4})',
-            r'(\d{1,2}[/-]\d{1,2}[/-]\d{4})'
-        ]
-        for pattern in dob_patterns:
-            dob_match = re.search(pattern, text, re.IGNORECASE)
-            if dob_match:
-                fields['date_of_birth'] = dob_match.group(1)
-                break
-    
-    return fields
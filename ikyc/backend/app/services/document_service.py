@@ -1,11 +1,64 @@
 import logging
+import re
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from services.ocr_service import ocr_service
 from core.database import db
 
+try:
+    import hyperscan  # Optional: one SIMD pass finds which field patterns can match at all
+except ImportError:
+    hyperscan = None
+
 logger = logging.getLogger(__name__)
 
+# Field extraction patterns, compiled once - within each list the first match wins
+AADHAAR_NUMBER_RE = re.compile(r'\b\d{4}\s*\d{4}\s*\d{4}\b')
+WHITESPACE_RE = re.compile(r'\s')
+AADHAAR_NAME_RES = (
+    re.compile(r'Name[:\s]+([A-Za-z\s]+)'),
+    re.compile(r'([A-Za-z\s]+)\s+DOB'),
+    re.compile(r'([A-Za-z\s]+)\s+\d{2}[/-]\d{2}[/-]\d{4}')
+)
+AADHAAR_DOB_RE = re.compile(r'DOB[:\s]*(\d{2}[/-]\d{2}[/-]\d{4})')
+PAN_NUMBER_RE = re.compile(r'\b[A-Z]{5}[0-9]{4}[A-Z]{1}\b')
+PAN_NAME_RE = re.compile(r'([A-Za-z\s]+)\s+[A-Z]{5}[0-9]{4}[A-Z]{1}')
+
+AADHAAR_PATTERN_IDS = {pattern: i for i, pattern in enumerate([AADHAAR_NUMBER_RE, *AADHAAR_NAME_RES, AADHAAR_DOB_RE])}
+
+def build_aadhaar_prefilter():
+    """Hyperscan database of every Aadhaar field pattern, or None without hyperscan"""
+    if hyperscan is None:
+        return None
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[pattern.pattern.encode('ascii') for pattern in AADHAAR_PATTERN_IDS],
+        ids=list(AADHAAR_PATTERN_IDS.values()),
+        elements=len(AADHAAR_PATTERN_IDS),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(AADHAAR_PATTERN_IDS)
+    )
+    return database
+
+AADHAAR_PREFILTER_DB = build_aadhaar_prefilter()
+_prefilter_local = threading.local()  # Scratch space is per thread
+PREFILTER_MIN_CHARS = 256  # Below this a plain re search is cheaper than the extra scan
+_RE_ONLY_WHITESPACE = ('\x1c', '\x1d', '\x1e', '\x1f')  # \s to re, not to hyperscan
+
+def prefilter_aadhaar_patterns(text: str) -> Optional[Set[int]]:
+    """Ids of Aadhaar field patterns present in the text, or None when every pattern must be tried"""
+    if AADHAAR_PREFILTER_DB is None or len(text) < PREFILTER_MIN_CHARS or not text.isascii():
+        return None  # re is Unicode-aware, the byte scan is not
+    if any(separator in text for separator in _RE_ONLY_WHITESPACE):
+        return None
+    scratch = getattr(_prefilter_local, 'scratch', None)
+    if scratch is None:
+        scratch = _prefilter_local.scratch = hyperscan.Scratch(AADHAAR_PREFILTER_DB)
+    present = set()
+    AADHAAR_PREFILTER_DB.scan(text.encode('ascii'), match_event_handler=lambda pattern_id, *_: present.add(pattern_id),
+                              scratch=scratch)
+    return present
+
 class DocumentProcessor:
     def __init__(self):
         self.ocr = ocr_service
@@ -49,41 +102,39 @@ class DocumentProcessor:
     
     def _extract_fields(self, text: str, document_type: str) -> Dict[str, Any]:
         """Extract specific fields based on document type"""
-        import re
-        
         fields = {}
         
         if document_type == "aadhaar":
+            # One hyperscan pass rules out the patterns that cannot match (sparing the unanchored
+            # name patterns their backtracking); re still extracts the groups
+            present = prefilter_aadhaar_patterns(text)
+            candidate = lambda pattern: present is None or AADHAAR_PATTERN_IDS[pattern] in present
+            
             # Extract Aadhaar number (12 digits)
-            aadhaar_match = re.search(r'\b\d{4}\s*\d{4}\s*\d{4}\b', text)
+            aadhaar_match = AADHAAR_NUMBER_RE.search(text) if candidate(AADHAAR_NUMBER_RE) else None
             if aadhaar_match:
-                fields['aadhaar_number'] = re.sub(r'\s', '', aadhaar_match.group())
+                fields['aadhaar_number'] = WHITESPACE_RE.sub('', aadhaar_match.group())
             
             # Extract name (usually after "Name:" or before "DOB:")
-            name_patterns = [
-                r'Name[:\s]+([A-Za-z\s]+)',
-                r'([A-Za-z\s]+)\s+DOB',
-                r'([A-Za-z\s]+)\s+\d{2}[/-]\d{2}[/-]\d{4}'
-            ]
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text)
+            for pattern in filter(candidate, AADHAAR_NAME_RES):
+                name_match = pattern.search(text)
                 if name_match:
                     fields['name'] = name_match.group(1).strip()
                     break
             
             # Extract DOB
-            dob_match = re.search(r'DOB[:\s]*(\d{2}[/-]\d{2}[/-]\d{4})', text)
+            dob_match = AADHAAR_DOB_RE.search(text) if candidate(AADHAAR_DOB_RE) else None
             if dob_match:
                 fields['date_of_birth'] = dob_match.group(1)
         
         elif document_type == "pan":
             # Extract PAN number
-            pan_match = re.search(r'\b[A-Z]{5}[0-9]{4}[A-Z]{1}\b', text)
+            pan_match = PAN_NUMBER_RE.search(text)
             if pan_match:
                 fields['pan_number'] = pan_match.group()
             
             # Extract name
-            name_match = re.search(r'([A-Za-z\s]+)\s+[A-Z]{5}[0-9]{4}[A-Z]{1}', text)
+            name_match = PAN_NAME_RE.search(text)
             if name_match:
                 fields['name'] = name_match.group(1).strip()
         
@@ -9,12 +9,12 @@ from pathlib import Path
 import json
 from typing import Dict
 
-# Add current directory to path
-sys.path.append(str(Path(__file__).parent))
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from ai_orchestrator import AIDocumentProcessor
-from ocr.free_multi_ocr import FreeMultiOCRProcessor
-from config.ai_config import AIConfig
+from ai_engine.ai_orchestrator import AIDocumentProcessor
+from ai_engine.ocr.free_multi_ocr import FreeMultiOCRProcessor
+from ai_engine.config.ai_config import AIConfig
 
 class RealImageTester:
     """Test with real Aadhaar images"""
@@ -6,11 +6,11 @@ import sys
 import os
 from pathlib import Path
 
-# Add current directory to path
-sys.path.append(str(Path(__file__).parent))
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from ocr.free_multi_ocr import FreeMultiOCRProcessor
-from config.ai_config import AIConfig
+from ai_engine.ocr.free_multi_ocr import FreeMultiOCRProcessor
+from ai_engine.config.ai_config import AIConfig
 
 def test_simplified_ocr_setup():
     print("🧪 Testing Simplified Free OCR Setup")
@@ -20,7 +20,7 @@ def test_simplified_ocr_setup():
     print("📋 Configuration Check:")
     try:
         print(f"OCR Engines: {AIConfig.OCR_ENGINES}")
-        print(f"OCR.space API Key: {'✓ Set' if AIConfig.OCR_SPACE_API_KEY != 'FREE_API_KEY' else '❌ Not set (optional)'}")
+        print(f"OCR.space API Key: {'✓ Set' if AIConfig.OCR_SPACE_API_KEY else '❌ Not set (optional)'}")
         print(f"OCR.space URL: {AIConfig.OCR_SPACE_URL}")
         print(f"OCR Confidence Threshold: {AIConfig.OCR_CONFIDENCE_THRESHOLD}")
         print(f"Supported Formats: {AIConfig.OCR_SUPPORTED_FORMATS}")
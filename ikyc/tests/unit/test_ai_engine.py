@@ -0,0 +1,140 @@
+"""
+Unit tests for the AI document processing orchestrator
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from ai_engine.ai_orchestrator import AIDocumentProcessor
+
+
+class _RemoteClientStub:
+    """Stands in for the Granite/Bedrock clients and records any call made to them"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append(name)
+            raise AssertionError(f"remote call {name} should have been skipped")
+        return record
+
+
+class _OCRStub:
+    def extract_text_from_document(self, document_type, preprocessing_result):
+        return {
+            'success': True,
+            'extracted_text': 'GOVERNMENT OF INDIA 2345 6789 0124',
+            'confidence_score': 0.9,
+            'field_extractions': {'aadhaar_number': '234567890124'}
+        }
+
+
+class _RemoteStagesStub:
+    """Granite and Bedrock in one: every remote stage returns `result`, and calls are counted"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def _respond(self, *args, **kwargs):
+        self.calls += 1
+        return dict(self.result)
+
+    analyze_document_semantics_async = detect_fraud_patterns_async = _respond
+    analyze_document_risk_async = validate_document_authenticity_async = _respond
+
+    def cross_validate_with_ibm(self, *args):
+        return {'success': True, 'consensus_analysis': {'agreement_level': 'HIGH', 'fraud_score': 0.1}}
+
+
+def _png(image: np.ndarray) -> bytes:
+    ok, buffer = cv2.imencode('.png', image)
+    assert ok
+    return buffer.tobytes()
+
+
+def _processor():
+    processor = AIDocumentProcessor()
+    processor.free_multi_ocr = _OCRStub()
+    processor.granite_ai = _RemoteClientStub()
+    processor.bedrock_titan = _RemoteClientStub()
+    return processor
+
+
+def test_decisive_tampering_skips_remote_analysis():
+    # Black/white noise: lighting variance and edge density both past their limits
+    noise = (np.random.default_rng(0).random((240, 320)) > 0.5).astype(np.uint8) * 255
+    processor = _processor()
+
+    result = processor.process_document(_png(cv2.cvtColor(noise, cv2.COLOR_GRAY2BGR)), 'aadhaar')
+
+    tampering = result['processing_steps']['tampering_detection']
+    assert tampering['indicators']['inconsistent_lighting'] and tampering['indicators']['irregular_edges']
+    assert tampering['tampering_score'] >= AIDocumentProcessor.TAMPERING_EARLY_EXIT_SCORE
+    assert processor.granite_ai.calls == [] and processor.bedrock_titan.calls == []
+    assert 'fraud_detection' not in result['processing_steps']
+    assert result['final_analysis']['status'] == 'REJECTED'
+    assert 'tampering_detected' in result['final_analysis']['fraud_indicators']
+
+
+def test_tampering_exit_threshold_is_reachable():
+    # The detector evaluates two of its four indicators - both firing must trigger the exit
+    gray = (np.random.default_rng(1).random((120, 160)) > 0.5).astype(np.uint8) * 255
+    result = _processor().image_processor.detect_tampering_signs(image_array=cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    assert result['is_likely_tampered']
+    assert result['tampering_score'] >= AIDocumentProcessor.TAMPERING_EARLY_EXIT_SCORE
+
+
+def _clean_png() -> bytes:
+    """Smooth gradient - passes tampering detection, so the remote stages run"""
+    gradient = np.tile(np.linspace(90, 170, 320, dtype=np.uint8), (240, 1))
+    return _png(cv2.cvtColor(gradient, cv2.COLOR_GRAY2BGR))
+
+
+def _processor_with_remote(result):
+    processor = AIDocumentProcessor()
+    processor.free_multi_ocr = _OCRStub()
+    processor.granite_ai = processor.bedrock_titan = _RemoteStagesStub(result)
+    return processor
+
+
+def test_successful_run_is_cached():
+    processor = _processor_with_remote({'success': True, 'fraud_score': 0.1})
+    first = processor.process_document(_clean_png(), 'aadhaar')
+    calls = processor.granite_ai.calls
+    second = processor.process_document(_clean_png(), 'aadhaar')
+    assert 'cache_hit' not in first and second['cache_hit'] is True
+    assert processor.granite_ai.calls == calls
+
+
+def test_run_with_failed_remote_stage_is_not_cached():
+    processor = _processor_with_remote({'success': False, 'error': 'ThrottlingException', 'throttled': True})
+    processor.process_document(_clean_png(), 'aadhaar')
+    calls = processor.granite_ai.calls
+    retry = processor.process_document(_clean_png(), 'aadhaar')
+    assert 'cache_hit' not in retry
+    assert processor.granite_ai.calls == 2 * calls  # The retry asked the remote stages again
+
+
+def test_run_with_mocked_remote_stage_is_not_cached():
+    processor = _processor_with_remote({'success': True, 'fraud_score': 0.1, 'mock_mode': True})
+    processor.process_document(_clean_png(), 'aadhaar')
+    assert 'cache_hit' not in processor.process_document(_clean_png(), 'aadhaar')
+
+
+def test_nested_customer_info_is_cached_regardless_of_key_order():
+    processor = _processor_with_remote({'success': True, 'fraud_score': 0.1})
+    customer = {'name': 'Rahul Kumar', 'address': {'city': 'Pune', 'pin': '411001'}}
+    first = processor.process_document(_clean_png(), 'aadhaar', customer)
+    reordered = {'address': {'pin': '411001', 'city': 'Pune'}, 'name': 'Rahul Kumar'}
+    second = processor.process_document(_clean_png(), 'aadhaar', reordered)
+    assert first['final_analysis']['status'] != 'ERROR'
+    assert second['cache_hit'] is True
@@ -0,0 +1,78 @@
+"""
+Unit tests for the async micro-batching queue
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from ai_engine.batch_queue import AsyncBatchQueue
+
+
+def make_queue(max_batch_size=8, max_wait_time=0.05):
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    return AsyncBatchQueue(double, max_batch_size=max_batch_size, max_wait_time=max_wait_time), batches
+
+
+def test_concurrent_requests_share_one_batch():
+    queue, batches = make_queue()
+
+    async def run():
+        return await asyncio.gather(*(queue.add_request(i) for i in range(3)))
+
+    assert asyncio.run(run()) == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+def test_full_batch_flushes_without_waiting():
+    queue, batches = make_queue(max_batch_size=2, max_wait_time=60)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(queue.add_request(1), queue.add_request(2)), 5)
+
+    assert asyncio.run(run()) == [2, 4]
+    assert batches == [[1, 2]]
+
+
+def test_cancelled_request_is_withdrawn_from_pending_batch():
+    queue, batches = make_queue()
+
+    async def run():
+        cancelled = asyncio.ensure_future(queue.add_request(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert not queue._pending  # Last waiter gone - timer cancelled, entry dropped
+        return await queue.add_request(3)
+
+    assert asyncio.run(run()) == 6
+    assert batches == [[3]]
+
+
+def test_loop_closed_before_flush_leaves_nothing_pending():
+    queue, batches = make_queue(max_wait_time=60)
+
+    async def abandon():
+        asyncio.ensure_future(queue.add_request(1))
+        await asyncio.sleep(0)
+
+    asyncio.run(abandon())  # asyncio.run cancels the waiter before closing its loop
+    assert not queue._pending
+    assert batches == []
+
+
+def test_batch_errors_reach_every_caller():
+    queue = AsyncBatchQueue(lambda items: items[:1], max_wait_time=0.01)
+
+    async def run():
+        return await asyncio.gather(queue.add_request('a'), queue.add_request('b'), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
@@ -0,0 +1,74 @@
+"""
+Unit tests for the streamed-JSON end detection used by the Bedrock client
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+pytest.importorskip('boto3')
+from ai_engine.aws.bedrock_client import _JsonEndScanner
+
+
+def scan(*chunks):
+    """Feed chunks in order, returning the end offset reported (or None) and the text up to it"""
+    scanner = _JsonEndScanner()
+    for chunk in chunks:
+        end = scanner.feed(chunk)
+        if end is not None:
+            return end, ''.join(chunks)[:end]
+    return None, None
+
+
+def test_object_followed_by_commentary():
+    end, text = scan('{"risk": 0.2} Let me know if you need more.')
+    assert text == '{"risk": 0.2}' and end == len(text)
+
+
+def test_array_value():
+    assert scan('[1, [2, 3], {"a": []}] trailing')[1] == '[1, [2, 3], {"a": []}]'
+
+
+def test_end_offset_spans_chunks():
+    end, text = scan('Here is the analysis:\n{"risk"', ': {"score": 0.', '4}}', '\nDone.')
+    assert json.loads(text[text.index('{'):]) == {'risk': {'score': 0.4}}
+    assert end == len('Here is the analysis:\n{"risk": {"score": 0.4}}')
+
+
+def test_incomplete_value_is_not_reported():
+    assert scan('{"risk": {"score": 0.4}') == (None, None)
+
+
+def test_braces_inside_strings_are_ignored():
+    value = '{"note": "closing } and { opening ] [ brackets", "ok": true}'
+    assert scan(value + ' tail')[1] == value
+
+
+def test_escaped_quotes_do_not_end_strings():
+    value = r'{"quote": "she said \"}\" then left", "n": 1}'
+    assert json.loads(scan(value + ' tail')[1]) == {'quote': 'she said "}" then left', 'n': 1}
+
+
+def test_escaped_backslash_before_closing_quote():
+    value = r'{"path": "C:\\", "n": {"m": 2}}'
+    assert json.loads(scan(value + ' tail')[1]) == {'path': 'C:\\', 'n': {'m': 2}}
+
+
+def test_escape_split_across_chunks():
+    value = r'{"quote": "a \"}\" b"}'
+    split = value.index('\\') + 1  # Chunk ends right after the backslash
+    assert scan(value[:split], value[split:] + ' tail')[1] == value
+
+
+def test_quotes_in_leading_prose_are_ignored():
+    value = '{"a": 1}'
+    assert scan('The "result" is: ' + value + ' "bye"')[1] == 'The "result" is: ' + value
+
+
+def test_stray_closing_bracket_before_value_is_ignored():
+    assert scan('] {"a": 1}')[1] == '] {"a": 1}'
@@ -0,0 +1,171 @@
+"""
+Unit tests for the in-memory TTL/LRU and semantic caches
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from ai_engine.utils import cache as cache_module
+from ai_engine.utils.cache import SemanticCache, TTLCache
+
+
+class FakeClock:
+    """Stands in for the time module so expiry can be tested without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, 'time', fake)
+    return fake
+
+
+# TTLCache
+
+def test_ttl_entries_expire(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('key', 'value')
+    clock.now += 59
+    assert cache.get('key') == 'value'
+    clock.now += 2
+    assert cache.get('key') is None
+    assert len(cache) == 0  # Expired entry is dropped on access
+
+
+def test_ttl_per_entry_override(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('short', 1, ttl=5)
+    cache.set('long', 2)
+    clock.now += 10
+    assert cache.get('short', 'missing') == 'missing'
+    assert cache.get('long') == 2
+
+
+def test_ttl_reset_on_overwrite(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('key', 'old')
+    clock.now += 50
+    cache.set('key', 'new')
+    clock.now += 50
+    assert cache.get('key') == 'new'
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_lru_overwrite_does_not_evict(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 10)
+    assert cache.get('a') == 10 and cache.get('b') == 2
+
+
+def test_invalidate_and_clear(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.invalidate('a')
+    cache.invalidate('missing')
+    assert cache.get('a') is None and cache.get('b') == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_falsy_values_are_cached(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('empty', {})
+    assert cache.get('empty', 'missing') == {}
+
+
+def test_concurrent_writers_respect_maxsize():
+    cache = TTLCache(maxsize=50, ttl=60)
+
+    def writer(offset):
+        for i in range(500):
+            cache.set((offset, i), i)
+            cache.get((offset, i // 2))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 50
+
+
+# SemanticCache
+
+def test_semantic_hit_on_similar_embedding(clock):
+    cache = SemanticCache(maxsize=10, ttl=60, threshold=0.95)
+    cache.set([1.0, 0.0, 0.0], 'stored')
+    assert cache.get([0.99, 0.05, 0.0]) == 'stored'
+    assert cache.get([0.0, 1.0, 0.0]) is None
+
+
+def test_semantic_hit_requires_same_tag(clock):
+    cache = SemanticCache(maxsize=10, ttl=60, threshold=0.95)
+    cache.set([1.0, 0.0], 'aadhaar result', tag='aadhaar')
+    assert cache.get([1.0, 0.0], tag='pan') is None
+    assert cache.get([1.0, 0.0], tag='aadhaar') == 'aadhaar result'
+
+
+def test_semantic_returns_closest_match(clock):
+    cache = SemanticCache(maxsize=10, ttl=60, threshold=0.9)
+    cache.set([1.0, 0.2], 'near')
+    cache.set([1.0, 0.0], 'exact')
+    assert cache.get([1.0, 0.0]) == 'exact'
+
+
+def test_semantic_entries_expire(clock):
+    cache = SemanticCache(maxsize=10, ttl=60)
+    cache.set([1.0, 0.0], 'stored')
+    clock.now += 61
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_semantic_overwrites_oldest_when_full(clock):
+    cache = SemanticCache(maxsize=2, ttl=60, threshold=0.99)
+    cache.set([1.0, 0.0, 0.0], 'first')
+    cache.set([0.0, 1.0, 0.0], 'second')
+    cache.set([0.0, 0.0, 1.0], 'third')
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    assert cache.get([0.0, 1.0, 0.0]) == 'second' and cache.get([0.0, 0.0, 1.0]) == 'third'
+    assert len(cache) == 2
+
+
+def test_semantic_ignores_zero_and_mismatched_vectors(clock):
+    cache = SemanticCache(maxsize=10, ttl=60)
+    cache.set([0.0, 0.0], 'zero')
+    assert len(cache) == 0
+    cache.set(np.array([1.0, 0.0]), 'stored')
+    assert cache.get([0.0, 0.0]) is None
+    assert cache.get([1.0, 0.0, 0.0]) is None  # Different embedding size
+
+
+def test_semantic_clear(clock):
+    cache = SemanticCache(maxsize=10, ttl=60)
+    cache.set([1.0, 0.0], 'stored')
+    cache.clear()
+    assert len(cache) == 0 and cache.get([1.0, 0.0]) is None
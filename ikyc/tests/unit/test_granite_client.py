@@ -0,0 +1,85 @@
+"""
+Unit tests for throttling retries in the IBM Granite client
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from ai_engine import limits
+from ai_engine.ibm import granite_client
+from ai_engine.ibm.granite_client import GraniteAIProcessor
+
+
+class ThrottledError(Exception):
+    """ibm_cloud_sdk_core ApiException shaped 429"""
+
+    def __init__(self):
+        super().__init__('Too Many Requests')
+        self.code = 429
+        self.http_response = type('Response', (), {'headers': {}})()
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Record retry delays instead of sleeping, with a limiter that never makes callers wait"""
+    delays = []
+    monkeypatch.setattr(limits.time, 'sleep', delays.append)
+    monkeypatch.setattr(granite_client, 'granite_limiter', limits.TokenBucketLimiter(max_rate=1000))
+    return delays
+
+
+def failing_then(client, name, failures, error_factory):
+    """Make Granite request `name` raise error_factory() for its first `failures` calls"""
+    request = getattr(client, name)
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        if len(calls) <= failures:
+            raise error_factory()
+        return request(*args)
+
+    setattr(client, name, flaky)
+    return calls
+
+
+def test_throttled_semantic_analysis_is_retried(no_sleep):
+    client = GraniteAIProcessor()
+    calls = failing_then(client, '_request_semantic_analysis', 2, ThrottledError)
+    result = client.analyze_document_semantics('text', 'aadhaar')
+    assert result['success'] and len(calls) == 3 and len(no_sleep) == 2
+
+
+def test_throttled_fraud_detection_is_retried_from_async(no_sleep):
+    client = GraniteAIProcessor()
+    calls = failing_then(client, '_request_fraud_detection', 1, ThrottledError)
+    result = asyncio.run(client.detect_fraud_patterns_async('text', {}))
+    assert result['success'] and len(calls) == 2
+
+
+def test_throttled_batch_is_retried(no_sleep):
+    client = GraniteAIProcessor()
+    calls = failing_then(client, '_request_semantic_analysis_batch', 1, ThrottledError)
+    results = client.analyze_documents_semantics_batch([('a', 'aadhaar'), ('b', 'pan')])
+    assert [result['success'] for result in results] == [True, True] and len(calls) == 2
+
+
+def test_persistent_throttling_becomes_a_failure_result(no_sleep):
+    client = GraniteAIProcessor()
+    calls = failing_then(client, '_request_fraud_detection', 100, ThrottledError)
+    result = client.detect_fraud_patterns('text', {})
+    assert result['success'] is False
+    assert len(calls) == limits.AIConfig.REMOTE_RETRY_MAX_TRIES
+
+
+def test_other_errors_fail_without_retry(no_sleep):
+    client = GraniteAIProcessor()
+    calls = failing_then(client, '_request_semantic_analysis', 1, lambda: ValueError('bad request'))
+    result = client.analyze_document_semantics('text', 'aadhaar')
+    assert result['success'] is False and len(calls) == 1 and no_sleep == []
@@ -0,0 +1,219 @@
+"""
+Unit tests for the remote-call rate limiter and throttling retries
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the ikyc directory to path so the ai_engine package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from ai_engine import limits
+from ai_engine.limits import TokenBucketLimiter, is_throttling_error, retry_on_throttle
+
+
+class ThrottledError(Exception):
+    """botocore ClientError shaped exception"""
+
+    def __init__(self, code='ThrottlingException', status=400, headers=None):
+        super().__init__(code)
+        self.response = {
+            'Error': {'Code': code, 'Message': code},
+            'ResponseMetadata': {'HTTPStatusCode': status, 'HTTPHeaders': headers or {}}
+        }
+
+
+class HTTPStatusError(Exception):
+    """requests.HTTPError shaped exception"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(status_code)
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record retry delays instead of sleeping"""
+    delays = []
+
+    async def fake_async_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(limits.time, 'sleep', delays.append)
+    monkeypatch.setattr(limits.asyncio, 'sleep', fake_async_sleep)
+    return delays
+
+
+def flaky(failures, error_factory):
+    """Callable that raises error_factory() for its first `failures` calls, then returns 'ok'"""
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error_factory()
+        return 'ok'
+    return call, calls
+
+
+# Token bucket
+
+def test_bucket_allows_burst_then_spaces_requests_at_rate():
+    limiter = TokenBucketLimiter(max_rate=4, time_period=1.0)
+    delays = [limiter._reserve() for _ in range(6)]
+    assert delays[:4] == [0.0] * 4
+    assert delays[4] == pytest.approx(0.25, abs=0.02)
+    assert delays[5] == pytest.approx(0.5, abs=0.02)
+
+
+def test_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(max_rate=20, time_period=1.0)
+    for _ in range(20):
+        limiter._reserve()
+    time.sleep(0.1)  # Two tokens back at 20/s
+    assert limiter._reserve() == 0.0
+    assert limiter._reserve() == 0.0
+    assert limiter._reserve() > 0.0
+
+
+def test_bucket_refill_is_capped_at_burst_size():
+    limiter = TokenBucketLimiter(max_rate=2, time_period=0.01)
+    time.sleep(0.05)  # Long enough to refill many times over
+    assert [limiter._reserve() for _ in range(2)] == [0.0, 0.0]
+    assert limiter._reserve() > 0.0
+
+
+def test_bucket_blocks_threads():
+    limiter = TokenBucketLimiter(max_rate=5, time_period=0.25)  # 20/s, burst of 5
+    started = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - started >= 0.2  # 5 beyond the burst at 20/s
+
+
+def test_bucket_blocks_coroutines_without_blocking_the_loop():
+    limiter = TokenBucketLimiter(max_rate=5, time_period=0.25)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        ticking = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+
+        async def limited():
+            async with limiter:
+                pass
+        await asyncio.gather(*(limited() for _ in range(10)))
+        ticking.cancel()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.2
+    assert len(ticks) > 5  # The loop kept running while the limited coroutines waited
+
+
+def test_bucket_is_shared_between_threads_and_coroutines():
+    limiter = TokenBucketLimiter(max_rate=5, time_period=0.25)
+    for _ in range(5):
+        limiter.acquire()  # Burst used up from blocking code
+    started = time.monotonic()
+    asyncio.run(limiter.acquire_async())
+    assert time.monotonic() - started >= 0.03
+
+
+# Throttling detection
+
+@pytest.mark.parametrize('error, throttled', [
+    (ThrottledError('ThrottlingException'), True),
+    (ThrottledError('ServiceUnavailableException', status=503), True),
+    (ThrottledError('ValidationException'), False),
+    (HTTPStatusError(429), True),
+    (HTTPStatusError(503), True),
+    (HTTPStatusError(500), False),
+    (ValueError('bad input'), False),
+])
+def test_is_throttling_error(error, throttled):
+    assert is_throttling_error(error) is throttled
+
+
+# Retries
+
+def test_retries_throttled_calls_until_success(sleeps):
+    call, calls = flaky(2, ThrottledError)
+    assert retry_on_throttle(max_tries=5, max_delay=10)(call)() == 'ok'
+    assert len(calls) == 3 and len(sleeps) == 2
+
+
+def test_honours_retry_after_header(sleeps):
+    call, _ = flaky(2, lambda: ThrottledError(headers={'retry-after': '1.5'}))
+    retry_on_throttle(max_tries=5, max_delay=10)(call)()
+    assert sleeps == [1.5, 1.5]
+
+
+def test_retry_after_is_capped_at_max_delay(sleeps):
+    call, _ = flaky(1, lambda: HTTPStatusError(429, headers={'Retry-After': '120'}))
+    retry_on_throttle(max_tries=3, max_delay=2)(call)()
+    assert sleeps == [2]
+
+
+def test_unparseable_retry_after_falls_back_to_jittered_backoff(sleeps):
+    call, _ = flaky(3, lambda: HTTPStatusError(429, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}))
+    retry_on_throttle(max_tries=5, max_delay=10)(call)()
+    assert [delay <= 0.5 * 2 ** attempt for attempt, delay in enumerate(sleeps)] == [True] * 3
+
+
+@pytest.mark.parametrize('error_factory', [
+    lambda: ValueError('bad input'),
+    lambda: ThrottledError('ValidationException'),
+    lambda: HTTPStatusError(500),
+])
+def test_non_throttling_errors_are_not_retried(sleeps, error_factory):
+    call, calls = flaky(1, error_factory)
+    with pytest.raises(Exception):
+        retry_on_throttle(max_tries=5)(call)()
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_gives_up_after_max_tries(sleeps):
+    call, calls = flaky(10, ThrottledError)
+    with pytest.raises(ThrottledError):
+        retry_on_throttle(max_tries=3)(call)()
+    assert len(calls) == 3 and len(sleeps) == 2
+
+
+def test_retries_coroutines(sleeps):
+    calls = []
+
+    @retry_on_throttle(max_tries=5, max_delay=10)
+    async def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ThrottledError(headers={'retry-after': '0.5'})
+        return 'ok'
+
+    assert asyncio.run(call()) == 'ok'
+    assert len(calls) == 3 and sleeps == [0.5, 0.5]
+
+
+def test_coroutine_non_throttling_errors_are_not_retried(sleeps):
+    calls = []
+
+    @retry_on_throttle(max_tries=5)
+    async def call():
+        calls.append(1)
+        raise ValueError('bad input')
+
+    with pytest.raises(ValueError):
+        asyncio.run(call())
+    assert len(calls) == 1 and sleeps == []
@@ -0,0 +1,125 @@
+"""
+Unit tests for the backend's HS256 session tokens
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+# Add the backend app directory to path so the core package is importable
+sys.path.append(str(Path(__file__).resolve().parents[2] / 'backend' / 'app'))
+
+pytest.importorskip('bcrypt')
+from core.security import SecurityManager
+
+SECRET = 'unit-test-secret-for-session-tokens'
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def make_token(header: dict, payload: dict, secret: str = SECRET, digest=hashlib.sha256) -> str:
+    """Build a token by hand, signing exactly what is given (whatever the header claims)"""
+    signing_input = f"{b64url(json.dumps(header).encode())}.{b64url(json.dumps(payload).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), digest).digest()
+    return f"{signing_input}.{b64url(signature)}"
+
+
+@pytest.fixture
+def manager():
+    return SecurityManager(secret_key=SECRET, bcrypt_rounds=4)
+
+
+def test_round_trip(manager):
+    token = manager.generate_session_token('user-42')
+    assert manager.verify_token(token) == 'user-42'
+
+
+def test_accepts_tokens_created_by_pyjwt(manager):
+    jwt = pytest.importorskip('jwt')
+    token = jwt.encode({'user_id': 'user-42', 'exp': int(time.time()) + 60}, SECRET, algorithm='HS256')
+    assert manager.verify_token(token) == 'user-42'
+
+
+def test_pyjwt_accepts_generated_tokens(manager):
+    jwt = pytest.importorskip('jwt')
+    token = manager.generate_session_token('user-42')
+    assert jwt.decode(token, SECRET, algorithms=['HS256'])['user_id'] == 'user-42'
+
+
+def test_rejects_other_secret(manager):
+    token = SecurityManager(secret_key='another-secret').generate_session_token('user-42')
+    assert manager.verify_token(token) is None
+
+
+def test_rejects_alg_none(manager):
+    payload = b64url(json.dumps({'user_id': 'admin'}).encode())
+    header = b64url(json.dumps({'alg': 'none', 'typ': 'JWT'}).encode())
+    assert manager.verify_token(f"{header}.{payload}.") is None
+
+
+def test_rejects_alg_hs512(manager):
+    # Correctly signed with the shared secret, but not the algorithm we issue
+    token = make_token({'alg': 'HS512', 'typ': 'JWT'}, {'user_id': 'user-42'}, digest=hashlib.sha512)
+    assert manager.verify_token(token) is None
+    # Header lies about the algorithm while the signature is HS256
+    token = make_token({'alg': 'HS512', 'typ': 'JWT'}, {'user_id': 'user-42'})
+    assert manager.verify_token(token) is None
+
+
+def test_rejects_tampered_signature(manager):
+    header, payload, signature = manager.generate_session_token('user-42').split('.')
+    flipped = b64url(bytes(byte ^ 1 for byte in base64.urlsafe_b64decode(signature + '==')))
+    assert manager.verify_token(f"{header}.{payload}.{flipped}") is None
+
+
+def test_rejects_tampered_payload(manager):
+    header, _, signature = manager.generate_session_token('user-42').split('.')
+    payload = b64url(json.dumps({'user_id': 'admin', 'exp': int(time.time()) + 60}).encode())
+    assert manager.verify_token(f"{header}.{payload}.{signature}") is None
+
+
+def test_rejects_expired_token(manager):
+    token = manager.generate_session_token('user-42', expires_delta=timedelta(seconds=-1))
+    assert manager.verify_token(token) is None
+
+
+@pytest.mark.parametrize('expire', ['9999999999', True, None, [1]])
+def test_rejects_non_numeric_exp(manager, expire):
+    token = make_token({'alg': 'HS256', 'typ': 'JWT'}, {'user_id': 'user-42', 'exp': expire})
+    assert manager.verify_token(token) is None
+
+
+@pytest.mark.parametrize('token', [
+    '',
+    'not-a-token',
+    'a.b',
+    'a.b.c',
+    '!!!.@@@.###',
+    'é.é.é',
+])
+def test_rejects_malformed_tokens(manager, token):
+    assert manager.verify_token(token) is None
+
+
+def test_rejects_non_ascii_segment(manager):
+    header, payload, signature = manager.generate_session_token('user-42').split('.')
+    assert manager.verify_token(f"{header}.{payload}é.{signature}") is None
+
+
+def test_rejects_non_object_segments(manager):
+    assert manager.verify_token(make_token(['HS256'], {'user_id': 'user-42'})) is None
+    assert manager.verify_token(make_token({'alg': 'HS256', 'typ': 'JWT'}, ['user-42'])) is None
+
+
+@pytest.mark.parametrize('token', [None, b'a.b.c', 42])
+def test_rejects_non_string_tokens(manager, token):
+    assert manager.verify_token(token) is None